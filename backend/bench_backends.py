@@ -0,0 +1,79 @@
+"""
+Compares the zero-shot inference backends (torch fp32, int8, onnx).
+
+Each backend runs in a fresh process so peak RSS is measured per backend. Scores
+are checked against the fp32 torch backend; the script exits with status 1 when
+a backend differs by more than --tolerance.
+
+Usage:
+    python bench_backends.py --texts 128 --batch-size 16 --tolerance 0.02
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench_scoring import load_texts
+from zero_shot import BACKENDS, ZeroShotEngine
+
+
+def run_backend(model_name, backend, texts, batch_size):
+    engine = ZeroShotEngine(model_name, backend=backend)
+    engine.score(texts[:batch_size], batch_size=batch_size)  # warm-up
+
+    latencies = []
+    scores = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        batch_start = time.perf_counter()
+        scores.extend(engine.classify(texts[i:i + batch_size], batch_size=batch_size)[1])
+        latencies.append(time.perf_counter() - batch_start)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+    return {
+        'scores': scores,
+        'texts_per_sec': len(texts) / elapsed,
+        'p50_batch_ms': statistics.median(latencies) * 1000,
+        'max_batch_ms': max(latencies) * 1000,
+        'peak_rss_mb': peak_rss_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and cross-check zero-shot inference backends.")
+    parser.add_argument('--model', default="facebook/bart-large-mnli")
+    parser.add_argument('--input', help="JSON corpus to take summaries from (default: synthetic texts).")
+    parser.add_argument('--texts', type=int, default=128)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--tolerance', type=float, default=0.02, help="Maximum allowed score difference vs. torch.")
+    args = parser.parse_args()
+
+    texts = load_texts(args.input, args.texts)
+    results = {}
+    for backend in ['torch'] + [b for b in args.backends if b != 'torch']:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results[backend] = executor.submit(run_backend, args.model, backend, texts, args.batch_size).result()
+
+    reference = results['torch']['scores']
+    failed = False
+    print(f"{'backend':<8} {'texts/s':>9} {'p50 batch ms':>13} {'max batch ms':>13} {'peak RSS MB':>12} {'max diff':>9}")
+    for backend, result in results.items():
+        diff = max(abs(a - b) for a, b in zip(reference, result['scores']))
+        failed |= diff > args.tolerance
+        print(f"{backend:<8} {result['texts_per_sec']:9.2f} {result['p50_batch_ms']:13.1f} "
+              f"{result['max_batch_ms']:13.1f} {result['peak_rss_mb']:12.0f} {diff:9.2e}")
+
+    if failed:
+        print(f"Scores differ from the torch backend by more than {args.tolerance}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares per-record cost of growing a DataFrame with pd.concat against ColumnarBuilder.
+
+Usage:
+    python bench_columnar.py --sizes 1000 10000 100000 --concat-limit 10000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from sinks import ColumnarBuilder
+
+COLUMNS = ['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags', 'Claim', 'Context', 'ArticleContent']
+
+
+def synthetic_record(i):
+    return {
+        "Title": f"Fact check {i}",
+        "Author": "Snopes Staff",
+        "Date": "2024-10-01T12:00:00+00:00",
+        "Summary": f"A claim about item {i} circulated online." * 3,
+        "URL": f"https://www.snopes.com/fact-check/item-{i}/",
+        "Image": f"https://media.snopes.com/{i}.jpg",
+        "PostDate": "Oct. 1, 2024",
+        "Rating": "False",
+        "Tags": ["Politics", "Viral"],
+        "Claim": f"Item {i} is real.",
+        "Context": "N/A",
+        "ArticleContent": "<article>" + "x" * 2000 + "</article>",
+    }
+
+
+def bench_concat(n):
+    df = pd.DataFrame(columns=COLUMNS)
+    start = time.perf_counter()
+    for i in range(n):
+        df = pd.concat([df, pd.DataFrame([synthetic_record(i)])], ignore_index=True)
+    return time.perf_counter() - start
+
+
+def bench_builder(n):
+    builder = ColumnarBuilder(COLUMNS)
+    start = time.perf_counter()
+    for i in range(n):
+        builder.write(synthetic_record(i))
+    builder.to_frame()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DataFrame building strategies.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--concat-limit', type=int, default=10000,
+                        help="Skip the pd.concat baseline above this size (it is quadratic).")
+    args = parser.parse_args()
+
+    print(f"{'records':>8} {'concat us/rec':>14} {'builder us/rec':>15}")
+    for n in args.sizes:
+        concat = f"{bench_concat(n) / n * 1e6:14.1f}" if n <= args.concat_limit else f"{'skipped':>14}"
+        builder = bench_builder(n) / n * 1e6
+        print(f"{n:>8} {concat} {builder:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
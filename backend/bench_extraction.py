@@ -0,0 +1,209 @@
+"""
+Micro-benchmark of HTML extraction over saved pages.
+
+Times the previous BeautifulSoup extraction code against the lxml extraction module:
+listing link extraction on listing pages and field extraction on article pages. Both
+implementations run on every page and any field they disagree on is reported.
+
+Article pages come from --articles files or, by default, the latest archived article
+pages in the response archive.
+
+Usage:
+    python bench_extraction.py --articles page.html ... --repeat 20
+    python bench_extraction.py --archive response_archive --limit 50
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+from extraction import extract_article, parse_listing
+from response_archive import ARCHIVE_DIR, ARTICLE, ResponseArchive, read_body
+
+BASE_URL = "https://www.snopes.com/fact-check/"
+DEFAULT_LISTINGS = sorted(Path(__file__).parent.glob('debug_*.html'))
+
+
+def bs4_parse_listing(html, base_url):
+    """
+    The listing link extraction scraper.py did before the extraction module.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for article in soup.find_all('div', class_='article_wrapper'):
+        a_tag = article.find('a', class_='outer_article_link_wrapper')
+        if a_tag and a_tag.get('href'):
+            links.append(urljoin(base_url, a_tag['href']))
+    return links
+
+
+def bs4_extract_article(html, url):
+    """
+    The article field extraction scraper.py did before the extraction module.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    data = {"Title": "N/A", "Author": "N/A", "Date": "N/A", "Summary": "N/A", "URL": url, "Image": "N/A", "PostDate": "N/A", "Rating": "N/A", "Tags": [], "Claim": "N/A", "Context": "N/A", "ArticleContent": "N/A"}
+
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            json_data = json.loads(script.string, strict=False)
+            if isinstance(json_data, list):
+                json_data = json_data[0]
+            if json_data.get('@type') == 'Article':
+                data['Title'] = json_data.get('headline', 'N/A')
+                author_info = json_data.get('author', {})
+                if isinstance(author_info, dict):
+                    data['Author'] = author_info.get('name', 'N/A')
+                data['Date'] = json_data.get('datePublished', 'N/A')
+                data['Summary'] = json_data.get('description', 'N/A')
+                break
+        except (json.JSONDecodeError, TypeError):
+            continue
+
+    if data['Title'] == "N/A":
+        title_tag = soup.find('title')
+        if title_tag:
+            data['Title'] = title_tag.text.replace('| Snopes.com', '').strip()
+
+    if data['Summary'] == "N/A":
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        if meta_desc and meta_desc.get('content'):
+            data['Summary'] = meta_desc['content'].strip()
+
+    if data['Author'] == "N/A":
+        author_section = soup.find('section', class_='author-container')
+        if author_section:
+            author_link = author_section.find('a', class_='author_link')
+            if author_link:
+                data['Author'] = author_link.text.strip()
+
+    if data['Summary'] == "N/A":
+        article_body = soup.find('article')
+        if article_body:
+            first_paragraph = article_body.find('p')
+            if first_paragraph:
+                data['Summary'] = first_paragraph.text.strip()
+
+    main_image = soup.find('img', id='cover-main')
+    if main_image and main_image.get('src'):
+        data['Image'] = main_image['src']
+
+    post_date = soup.select_one('#article_main > section > section > div > section:nth-of-type(1) > div > div > div:nth-of-type(2) > h3')
+    if post_date:
+        data['PostDate'] = post_date.text.strip()
+
+    rating_element = soup.select_one('html body main section section div div:nth-of-type(2) div:nth-of-type(1) article section div:nth-of-type(2) a div:nth-of-type(2)')
+    if rating_element:
+        data['Rating'] = rating_element.text.strip()
+
+    tag_section = soup.find('div', id='tag_section')
+    if tag_section:
+        data['Tags'] = [tag.text.strip() for tag in tag_section.find_all('a', class_='tag_button')]
+
+    claim_wrapper = soup.find('div', class_='claim_wrapper')
+    if claim_wrapper:
+        claim_cont = claim_wrapper.find('div', class_='claim_cont')
+        if claim_cont:
+            data['Claim'] = claim_cont.text.strip()
+
+    context_element = soup.find('div', class_='outer_fact_check_context')
+    if context_element:
+        context_parts = []
+        for info_wrapper in context_element.find_all('div', class_='fact_check_info_wrapper'):
+            title = info_wrapper.find('span', class_='fact_check_info_title')
+            description = info_wrapper.find('p', class_='fact_check_info_description')
+            if title and description:
+                context_parts.append(f"{title.text.strip()}: {description.text.strip()}")
+        data['Context'] = ' '.join(context_parts)
+
+    article_content = soup.find('article', id='article-content')
+    if article_content:
+        data['ArticleContent'] = str(article_content)
+
+    return data
+
+
+def per_page_ms(func, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def mismatches(old, new):
+    """
+    Returns:
+        list: Fields the two extractions disagree on. ArticleContent is compared by its text,
+            since BeautifulSoup and lxml serialize the same element differently.
+    """
+    fields = []
+    for field in old:
+        old_value, new_value = old[field], new.get(field)
+        if field == 'ArticleContent' and 'N/A' not in (old_value, new_value):
+            old_value = ' '.join(lxml.html.fragment_fromstring(old_value).text_content().split())
+            new_value = ' '.join(lxml.html.fragment_fromstring(new_value).text_content().split())
+        if old_value != new_value:
+            fields.append(field)
+    return fields
+
+
+def archived_articles(root, limit):
+    """
+    Yields:
+        tuple: (url, body) of the latest archived article pages.
+    """
+    if not os.path.exists(os.path.join(root, 'index.sqlite')):
+        return
+    with ResponseArchive(root) as archive:
+        for url, segment, offset, length in archive.locations(ARTICLE)[:limit]:
+            yield url, read_body(root, segment, offset, length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the previous and current HTML extraction per page.")
+    parser.add_argument('--listings', nargs='*', type=Path, default=DEFAULT_LISTINGS, help="Saved listing pages.")
+    parser.add_argument('--articles', nargs='*', type=Path, default=[], help="Saved article pages.")
+    parser.add_argument('--archive', default=ARCHIVE_DIR,
+                        help="Response archive to take article pages from when --articles is not given.")
+    parser.add_argument('--limit', type=int, default=50, help="Archived article pages to benchmark.")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    listings = [(path.name, path.read_bytes()) for path in args.listings]
+    if args.articles:
+        articles = [(BASE_URL + path.stem, path.read_bytes()) for path in args.articles]
+    else:
+        articles = list(archived_articles(args.archive, args.limit))
+
+    print(f"{'listing page':<48} {'bs4 ms':>8} {'lxml ms':>8} {'links':>6}")
+    for name, html in listings:
+        old_ms = per_page_ms(lambda h: bs4_parse_listing(h, BASE_URL), html, args.repeat)
+        new_ms = per_page_ms(lambda h: parse_listing(h, BASE_URL), html, args.repeat)
+        same = bs4_parse_listing(html, BASE_URL) == parse_listing(html, BASE_URL)
+        print(f"{name[-48:]:<48} {old_ms:8.2f} {new_ms:8.2f} {'same' if same else 'DIFF':>6}")
+
+    if not articles:
+        print(f"No article pages: pass --articles or crawl into {args.archive} first.")
+        return
+    print(f"\n{'article page':<48} {'bs4 ms':>8} {'lxml ms':>8}  fields")
+    old_total = new_total = 0.0
+    differing = 0
+    for url, html in articles:
+        old_ms = per_page_ms(lambda h: bs4_extract_article(h, url), html, args.repeat)
+        new_ms = per_page_ms(lambda h: extract_article(h, url), html, args.repeat)
+        old_total, new_total = old_total + old_ms, new_total + new_ms
+        fields = mismatches(bs4_extract_article(html, url), extract_article(html, url))
+        differing += bool(fields)
+        print(f"{url[-48:]:<48} {old_ms:8.2f} {new_ms:8.2f}  {'DIFF ' + ', '.join(fields) if fields else 'same'}")
+    print(f"\n{len(articles)} article pages: bs4 {old_total / len(articles):.2f} ms, lxml {new_total / len(articles):.2f} ms "
+          f"per page ({old_total / new_total:.1f}x); {differing} with differing fields")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmarks the fetch engine against a local HTTP server serving saved listing pages.
+
+Usage:
+    python bench_fetch.py --pages 200 --latency 0.05
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from fetcher import Fetcher
+
+FIXTURE = Path(__file__).with_name('debug_page_1.html')
+
+
+def serve_fixture(body, latency):
+    """
+    Starts a local server that answers every GET with the fixture page after a fixed delay.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call shutdown() when done).
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs concurrent fetching.")
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated server latency in seconds.")
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    server = serve_fixture(FIXTURE.read_bytes(), args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/fact-check/"
+    urls = [f"{base_url}?pagenum={n}" for n in range(1, args.pages + 1)]
+
+    start = time.perf_counter()
+    with requests.Session() as session:
+        for url in urls:
+            session.get(url).raise_for_status()
+    serial = time.perf_counter() - start
+    print(f"serial:     {args.pages / serial:8.1f} pages/s")
+
+    start = time.perf_counter()
+    with Fetcher(concurrency=args.concurrency, rate_per_host=0) as fetcher:
+        errors = sum(1 for _, _, error in fetcher.fetch_all(urls) if error is not None)
+    concurrent = time.perf_counter() - start
+    print(f"concurrent: {args.pages / concurrent:8.1f} pages/s ({errors} errors, {serial / concurrent:.1f}x)")
+
+    start = time.perf_counter()
+    with Fetcher(concurrency=args.concurrency, rate_per_host=50, burst=5) as fetcher:
+        list(fetcher.fetch_all(urls[:100]))
+    limited = time.perf_counter() - start
+    print(f"rate-limited (50 req/s per host): {min(100, args.pages) / limited:8.1f} pages/s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures the cost of importing the backend scripts.
+
+Each module is imported in a fresh interpreter; the script reports wall time, peak RSS
+and whether torch/transformers got pulled in.
+
+Usage:
+    python bench_import.py [module ...]
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    'seconds': elapsed,
+    'peak_rss_mb': peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024,
+    'torch': 'torch' in sys.modules,
+    'transformers': 'transformers' in sys.modules,
+}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of the backend modules.")
+    parser.add_argument('modules', nargs='*', default=['scraper', 'llm_cat', 'zero_shot'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'module':<12} {'best s':>8} {'peak RSS MB':>12} {'torch':>6} {'transformers':>13}")
+    for module in args.modules:
+        runs = []
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', PROBE.format(module=module)],
+                cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        best = min(runs, key=lambda run: run['seconds'])
+        print(f"{module:<12} {best['seconds']:8.3f} {best['peak_rss_mb']:12.0f} "
+              f"{str(best['torch']):>6} {str(best['transformers']):>13}")
+
+
+if __name__ == "__main__":
+    main()
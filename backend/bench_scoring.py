@@ -0,0 +1,51 @@
+"""
+Throughput of per-row difficulty scoring versus the batched API.
+
+Usage:
+    python bench_scoring.py --texts 256 --batch-size 32 [--input snopes_fact_checks_cleaned.json]
+"""
+import argparse
+import json
+import random
+import time
+
+from llm_cat import DifficultyScorer
+
+
+def load_texts(path, n):
+    if path:
+        with open(path, encoding='utf-8') as f:
+            summaries = [row.get('Summary') for row in json.load(f) if row.get('Summary')]
+        return summaries[:n]
+    rng = random.Random(0)
+    words = "claim viral photo politician said video shows study found rumor online post".split()
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(8, 60))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark difficulty scoring throughput.")
+    parser.add_argument('--model', default="facebook/bart-large-mnli")
+    parser.add_argument('--input', help="JSON corpus to take summaries from (default: synthetic texts).")
+    parser.add_argument('--texts', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    texts = load_texts(args.input, args.texts)
+    scorer = DifficultyScorer(model_name=args.model, device=-1)
+    scorer.score_batch(texts[:args.batch_size], batch_size=args.batch_size)  # warm-up
+
+    start = time.perf_counter()
+    per_row = [scorer.score_difficulty(text) for text in texts]
+    per_row_rate = len(texts) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batched = scorer.score_batch(texts, batch_size=args.batch_size)
+    batched_rate = len(texts) / (time.perf_counter() - start)
+
+    max_diff = max(abs(a - b) for a, b in zip(per_row, batched))
+    print(f"per-row: {per_row_rate:8.2f} texts/s")
+    print(f"batched: {batched_rate:8.2f} texts/s ({batched_rate / per_row_rate:.1f}x, max score diff {max_diff:.2e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Exercises the bulk uploader against a local stand-in for the PostgREST endpoint.
+
+The stand-in upserts rows into memory, answers a share of requests with 503, rejects
+any batch containing a row without a Title (like a NOT NULL violation) and returns 413
+for oversized bodies. The script checks that every valid row arrived and every invalid
+row was dead-lettered, and exits with status 1 otherwise.
+
+Usage:
+    python bench_upload.py --rows 5000 --bad 20 --failure-rate 0.1 --latency 0.02
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from uploader import BulkUploader
+
+
+def serve_postgrest(latency, failure_rate, max_body_bytes, seed=0):
+    """
+    Starts a local server that accepts PostgREST-style bulk upserts, paged reads and deletes.
+
+    Returns:
+        tuple: (ThreadingHTTPServer, dict of stored rows keyed by the on_conflict column).
+    """
+    rows = {}
+    lock = threading.Lock()
+    rng = random.Random(seed)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, message=''):
+            body = json.dumps({'message': message}).encode('utf-8') if message else b''
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            time.sleep(latency)
+            with lock:
+                flaky = rng.random() < failure_rate
+            if flaky:
+                return self._reply(503, 'Service Unavailable')
+            if len(body) > max_body_bytes:
+                return self._reply(413, 'Payload Too Large')
+            batch = json.loads(body)
+            if any(row.get('Title') is None for row in batch):
+                return self._reply(400, 'null value in column "Title" violates not-null constraint')
+            conflict = self.path.split('on_conflict=')[-1].split('&')[0]
+            with lock:
+                for row in batch:
+                    rows[row[conflict]] = row
+            self._reply(201)
+
+        def do_GET(self):
+            # Paged single-column reads: ?select=<column>&limit=<n>&offset=<m>
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+            offset, limit = int(query.get('offset', 0)), int(query.get('limit', len(rows)))
+            with lock:
+                page = [{query['select']: row.get(query['select'])} for row in list(rows.values())[offset:offset + limit]]
+            body = json.dumps(page).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_DELETE(self):
+            # Only the in-filter the uploader sends is supported: ?<column>=in.("a","b")
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            with lock:
+                for column, (condition,) in query.items():
+                    values = next(csv.reader([condition[len('in.('):-1]], escapechar='\\'))
+                    for value in values:
+                        rows.pop(value, None)
+            self._reply(204)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk uploader against a local PostgREST stand-in.")
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--bad', type=int, default=20, help="Rows the stand-in rejects.")
+    parser.add_argument('--failure-rate', type=float, default=0.1, help="Share of requests answered with 503.")
+    parser.add_argument('--latency', type=float, default=0.02, help="Server-side delay per request in seconds.")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--max-batch-bytes', type=int, default=256 * 1024)
+    parser.add_argument('--server-max-bytes', type=int, default=128 * 1024, help="Bodies above this get a 413.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    bad = set(rng.sample(range(args.rows), args.bad))
+    records = [
+        {'Title': None if i in bad else f"Claim {i}", 'URL': f"https://example.com/{i}",
+         'Summary': " ".join(rng.choice("claim viral photo video said".split()) for _ in range(40))}
+        for i in range(args.rows)
+    ]
+
+    server, stored = serve_postgrest(args.latency, args.failure_rate, args.server_max_bytes)
+    with tempfile.TemporaryDirectory() as tmp:
+        dead_letter_path = os.path.join(tmp, 'dead_letter.jsonl')
+        start = time.perf_counter()
+        with BulkUploader(f"http://127.0.0.1:{server.server_port}", 'test-key', on_conflict='URL',
+                          concurrency=args.concurrency, max_batch_bytes=args.max_batch_bytes, backoff=0.05,
+                          max_backoff=1.0, dead_letter_path=dead_letter_path) as uploader:
+            stats = uploader.upsert(records)
+        elapsed = time.perf_counter() - start
+        with open(dead_letter_path, encoding='utf-8') if os.path.exists(dead_letter_path) else open(os.devnull) as f:
+            rejected = {json.loads(line)['record']['URL'] for line in f}
+    server.shutdown()
+
+    print(f"{stats['uploaded']} rows in {elapsed:.2f}s ({stats['uploaded'] / elapsed:.0f} rows/s), "
+          f"{stats['requests']} requests, {stats['retries']} retries, {stats['dead_lettered']} dead-lettered, "
+          f"final batch budget {uploader.max_batch_bytes} bytes")
+
+    expected_stored = {record['URL'] for i, record in enumerate(records) if i not in bad}
+    expected_rejected = {records[i]['URL'] for i in bad}
+    if set(stored) != expected_stored or rejected != expected_rejected:
+        print(f"Mismatch: {len(expected_stored - set(stored))} rows missing, "
+              f"{len(rejected ^ expected_rejected)} wrongly dead-lettered")
+        sys.exit(1)
+    print("All valid rows stored; all invalid rows dead-lettered.")
+
+
+if __name__ == "__main__":
+    main()
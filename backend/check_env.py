@@ -0,0 +1,19 @@
+import sys
+
+
+def main():
+    # Imported here so the heavy ML stack is only loaded when the check actually runs
+    import numpy as np
+    import pandas as pd
+    import torch
+    import transformers
+
+    print(f"Python version: {sys.version}")
+    print(f"NumPy version: {np.__version__}")
+    print(f"PyTorch version: {torch.__version__}")
+    print(f"Pandas version: {pd.__version__}")
+    print(f"Transformers version: {transformers.__version__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def record_hash(record):
+    """
+    Hashes the extracted fields of a record, so page noise (ads, nonces) does not count as a change.
+
+    Args:
+        record (dict): A scraped record.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CrawlState:
+    def __init__(self, path='crawl_state.sqlite'):
+        """
+        Persistent URL frontier and seen-set backed by SQLite.
+
+        Every article URL is stored with its validators (ETag / Last-Modified), the hash
+        of the last extracted record, the scrape timestamp and a status:
+        'pending' (discovered, not yet scraped), 'done' or 'failed'.
+
+        Args:
+            path (str): SQLite database path.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                scraped_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def known(self, urls):
+        """
+        Returns:
+            set: The subset of urls that have been scraped successfully before.
+        """
+        urls = list(urls)
+        found = set()
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT url FROM articles WHERE status = '{DONE}' AND url IN ({placeholders})", chunk
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    def add_pending(self, urls):
+        """
+        Adds URLs to the frontier; URLs that are already known keep their state.
+        """
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO articles (url, status) VALUES (?, ?)", ((url, PENDING) for url in urls)
+        )
+        self.conn.commit()
+
+    def requeue(self, urls):
+        """
+        Marks URLs as pending again, keeping their validators for conditional GETs.
+        """
+        self.conn.executemany("UPDATE articles SET status = ? WHERE url = ?", ((PENDING, url) for url in urls))
+        self.conn.commit()
+
+    def pending(self):
+        """
+        Returns:
+            list: URLs discovered but not scraped yet (e.g. left over from a crashed run).
+        """
+        return [row[0] for row in self.conn.execute(
+            "SELECT url FROM articles WHERE status IN (?, ?) ORDER BY rowid", (PENDING, FAILED)
+        )]
+
+    def conditional_headers(self, url):
+        """
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers for a previously scraped URL.
+        """
+        row = self.conn.execute("SELECT etag, last_modified FROM articles WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def content_hash(self, url):
+        row = self.conn.execute("SELECT content_hash FROM articles WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def mark_done(self, url, etag=None, last_modified=None, content_hash=None, commit=True):
+        """
+        Records a successful scrape (or a 304 revalidation when content_hash is None).
+        """
+        self.conn.execute("""
+            INSERT INTO articles (url, status, etag, last_modified, content_hash, scraped_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                status = excluded.status,
+                etag = COALESCE(excluded.etag, articles.etag),
+                last_modified = COALESCE(excluded.last_modified, articles.last_modified),
+                content_hash = COALESCE(excluded.content_hash, articles.content_hash),
+                scraped_at = excluded.scraped_at
+        """, (url, DONE, etag, last_modified, content_hash, time.time()))
+        if commit:
+            self.conn.commit()
+
+    def mark_failed(self, url, commit=True):
+        self.conn.execute(
+            "INSERT INTO articles (url, status) VALUES (?, ?) ON CONFLICT(url) DO UPDATE SET status = excluded.status",
+            (url, FAILED),
+        )
+        if commit:
+            self.conn.commit()
+
+    def commit(self):
+        self.conn.commit()
@@ -0,0 +1,181 @@
+import json
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+# Selectors are compiled to XPath once at import time instead of on every page
+LISTING_ARTICLE = CSSSelector('div.article_wrapper')
+LISTING_LINK = CSSSelector('a.outer_article_link_wrapper')
+
+JSON_LD = etree.XPath('//script[@type="application/ld+json"]/text()')
+TITLE = etree.XPath('//title')
+# Nested lookups search inside the first container only, as the BeautifulSoup code did
+META_DESCRIPTION = etree.XPath('//meta[@name="description"]')
+AUTHOR_SECTION = CSSSelector('section.author-container')
+AUTHOR_LINK = CSSSelector('a.author_link')
+ARTICLE = etree.XPath('//article')
+PARAGRAPH = etree.XPath('.//p')
+MAIN_IMAGE = etree.XPath('//img[@id="cover-main"]')
+POST_DATE = CSSSelector(
+    '#article_main > section > section > div > section:nth-of-type(1) > div > div > div:nth-of-type(2) > h3'
+)
+RATING = CSSSelector(
+    'html body main section section div div:nth-of-type(2) div:nth-of-type(1) article section div:nth-of-type(2) a div:nth-of-type(2)'
+)
+TAG_SECTION = CSSSelector('div#tag_section')
+TAG_BUTTON = CSSSelector('a.tag_button')
+CLAIM_WRAPPER = CSSSelector('div.claim_wrapper')
+CLAIM = CSSSelector('div.claim_cont')
+CONTEXT = CSSSelector('div.outer_fact_check_context')
+CONTEXT_INFO = CSSSelector('div.fact_check_info_wrapper')
+CONTEXT_TITLE = CSSSelector('span.fact_check_info_title')
+CONTEXT_DESCRIPTION = CSSSelector('p.fact_check_info_description')
+ARTICLE_CONTENT = etree.XPath('//article[@id="article-content"]')
+
+# Fields the JSON-LD Article object provides; when all are present the DOM fallbacks are skipped
+JSON_LD_FIELDS = ('Title', 'Author', 'Date', 'Summary')
+
+
+def _first(selector, node):
+    matches = selector(node)
+    return matches[0] if matches else None
+
+
+def _text(element):
+    return element.text_content().strip()
+
+
+def parse_html(html):
+    """
+    Parses a page into an lxml tree.
+
+    Args:
+        html (str or bytes): The page HTML; bytes are decoded using the page's declared charset.
+
+    Returns:
+        lxml.html.HtmlElement: The document root.
+    """
+    return lxml.html.document_fromstring(html)
+
+
+def parse_listing(html, base_url):
+    """
+    Extracts the article links from a fact-check listing page.
+
+    Args:
+        html (str or bytes): The listing page HTML.
+        base_url (str): URL used to resolve relative links.
+
+    Returns:
+        list: Absolute article URLs in page order.
+    """
+    root = parse_html(html)
+    links = []
+    for article in LISTING_ARTICLE(root):
+        a_tag = _first(LISTING_LINK, article)
+        if a_tag is not None and a_tag.get('href'):
+            links.append(urljoin(base_url, a_tag.get('href')))
+    return links
+
+
+def _extract_json_ld(root, data):
+    for script in JSON_LD(root):
+        try:
+            json_data = json.loads(script, strict=False)
+            if isinstance(json_data, list):
+                json_data = json_data[0]
+            if json_data.get('@type') == 'Article':
+                data['Title'] = json_data.get('headline', 'N/A')
+                author_info = json_data.get('author', {})
+                if isinstance(author_info, dict):
+                    data['Author'] = author_info.get('name', 'N/A')
+                data['Date'] = json_data.get('datePublished', 'N/A')
+                data['Summary'] = json_data.get('description', 'N/A')
+                return
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            continue
+
+
+def _extract_fallbacks(root, data):
+    if data['Title'] == "N/A":
+        title_tag = _first(TITLE, root)
+        if title_tag is not None:
+            data['Title'] = title_tag.text_content().replace('| Snopes.com', '').strip()
+
+    if data['Summary'] == "N/A":
+        meta_desc = _first(META_DESCRIPTION, root)
+        if meta_desc is not None and meta_desc.get('content'):
+            data['Summary'] = meta_desc.get('content').strip()
+
+    if data['Author'] == "N/A":
+        author_section = _first(AUTHOR_SECTION, root)
+        author_link = _first(AUTHOR_LINK, author_section) if author_section is not None else None
+        if author_link is not None:
+            data['Author'] = _text(author_link)
+
+    if data['Summary'] == "N/A":
+        article_body = _first(ARTICLE, root)
+        first_paragraph = _first(PARAGRAPH, article_body) if article_body is not None else None
+        if first_paragraph is not None:
+            data['Summary'] = _text(first_paragraph)
+
+
+def extract_article(html, url):
+    """
+    Extracts the fact-check fields from an article page.
+
+    JSON-LD is read first; the title/author/summary DOM fallbacks only run for fields it did not provide.
+
+    Args:
+        html (str or bytes): The article page HTML.
+        url (str): The article URL.
+
+    Returns:
+        dict: One record with the scraper's columns.
+    """
+    root = parse_html(html)
+
+    data = {"Title": "N/A", "Author": "N/A", "Date": "N/A", "Summary": "N/A", "URL": url, "Image": "N/A", "PostDate": "N/A", "Rating": "N/A", "Tags": [], "Claim": "N/A", "Context": "N/A", "ArticleContent": "N/A"}
+
+    _extract_json_ld(root, data)
+    if any(data[field] == "N/A" for field in JSON_LD_FIELDS):
+        _extract_fallbacks(root, data)
+
+    main_image = _first(MAIN_IMAGE, root)
+    if main_image is not None and main_image.get('src'):
+        data['Image'] = main_image.get('src')
+
+    post_date = _first(POST_DATE, root)
+    if post_date is not None:
+        data['PostDate'] = _text(post_date)
+
+    rating_element = _first(RATING, root)
+    if rating_element is not None:
+        data['Rating'] = _text(rating_element)
+
+    tag_section = _first(TAG_SECTION, root)
+    if tag_section is not None:
+        data['Tags'] = [_text(tag) for tag in TAG_BUTTON(tag_section)]
+
+    claim_wrapper = _first(CLAIM_WRAPPER, root)
+    claim_cont = _first(CLAIM, claim_wrapper) if claim_wrapper is not None else None
+    if claim_cont is not None:
+        data['Claim'] = _text(claim_cont)
+
+    context_element = _first(CONTEXT, root)
+    if context_element is not None:
+        context_parts = []
+        for info_wrapper in CONTEXT_INFO(context_element):
+            title = _first(CONTEXT_TITLE, info_wrapper)
+            description = _first(CONTEXT_DESCRIPTION, info_wrapper)
+            if title is not None and description is not None:
+                context_parts.append(f"{_text(title)}: {_text(description)}")
+        data['Context'] = ' '.join(context_parts)
+
+    article_content = _first(ARTICLE_CONTENT, root)
+    if article_content is not None:
+        data['ArticleContent'] = lxml.html.tostring(article_content, encoding='unicode', with_tail=False)
+
+    return data
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        """
+        Thread-safe token bucket used as a politeness limiter.
+
+        Args:
+            rate (float): Tokens added per second (sustained requests per second).
+            burst (int): Maximum number of tokens that can be stored.
+        """
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and consumes it.
+        """
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Fetcher:
+    def __init__(self, headers=None, concurrency=8, rate_per_host=2.0, burst=1, timeout=30):
+        """
+        Bounded thread-pool HTTP fetcher with a shared connection pool.
+
+        Args:
+            headers (dict): Headers sent with every request.
+            concurrency (int): Maximum number of requests in flight.
+            rate_per_host (float): Sustained requests per second allowed per host (<= 0 disables the limit).
+            burst (int): Number of requests a host may receive back-to-back before the rate applies.
+            timeout (float): Per-request timeout in seconds.
+        """
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _bucket_for(self, url):
+        host = urlsplit(url).netloc
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate_per_host, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def fetch(self, url, headers=None):
+        """
+        Fetches a single URL, waiting for the host's politeness limiter first.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (dict): Extra headers for this request only.
+
+        Returns:
+            requests.Response: The response; raises for HTTP error statuses.
+        """
+        host = urlsplit(url).netloc
+        self._bucket_for(url).acquire()
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            METRICS.count('http_errors_total', host=host)
+            raise
+        METRICS.observe('fetch_seconds', time.perf_counter() - start, host=host)
+        METRICS.count('http_responses_total', host=host, status=response.status_code)
+        METRICS.count('http_bytes_total', len(response.content), host=host)
+        response.raise_for_status()
+        return response
+
+    def fetch_all(self, urls, ordered=False, headers_for=None, max_buffered=None):
+        """
+        Fetches many URLs concurrently.
+
+        URLs are submitted lazily: at most `max_buffered` requests are in flight or waiting
+        to be consumed, so a slow consumer pauses downloading instead of buffering the whole crawl.
+
+        Args:
+            urls (iterable): URLs to fetch.
+            ordered (bool): Yield results in input order instead of completion order.
+            headers_for (callable): Optional url -> dict of extra headers (e.g. conditional GET validators).
+            max_buffered (int): Bound on in-flight + unconsumed responses; defaults to twice the concurrency.
+
+        Yields:
+            tuple: (url, response, error) where exactly one of response/error is None.
+        """
+        max_buffered = max_buffered or self.concurrency * 2
+        urls = iter(urls)
+        pending = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_buffered:
+                url = next(urls, None)
+                if url is None:
+                    exhausted = True
+                    break
+                pending.append((url, self._executor.submit(self.fetch, url, headers_for(url) if headers_for else None)))
+            if not pending:
+                return
+
+            if ordered:
+                url, future = pending.popleft()
+            else:
+                wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                url, future = next(item for item in pending if item[1].done())
+                pending.remove((url, future))
+
+            try:
+                yield url, future.result(), None
+            except requests.exceptions.RequestException as e:
+                yield url, None, e
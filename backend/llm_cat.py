@@ -1,19 +1,38 @@
 # Use new)en
-import pandas as pd
-from transformers import pipeline
-import torch
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
+import pandas as pd
+
+from metrics import METRICS, add_arguments, instrumented
+from score_cache import ScoreCache
+from sinks import JsonLinesSink, iter_frames, iter_jsonl
+from storage import DATASET_DIR, export, update_column
+from zero_shot import BACKENDS, CANDIDATE_LABELS, HYPOTHESIS_TEMPLATE, get_engine
 
 class DifficultyScorer:
-    def __init__(self, model_name="facebook/bart-large-mnli", device=-1):
+    def __init__(self, model_name="facebook/bart-large-mnli", device=-1, cache=None,
+                 hypothesis_template=HYPOTHESIS_TEMPLATE, backend='torch'):
         """
-        Initializes the zero-shot classification pipeline.
+        Binds to the process-wide zero-shot engine; the model is loaded on first use.
 
         Args:
             model_name (str): Hugging Face model name for zero-shot classification.
             device (int): Device to run the model on (-1 for CPU, >=0 for GPU).
+            cache (ScoreCache): Optional persistent score cache; only cache misses are run through the model.
+            hypothesis_template (str): Template the candidate labels are inserted into.
+            backend (str): Inference backend: 'torch', 'int8' or 'onnx' (see zero_shot.BACKENDS).
         """
-        self.classifier = pipeline("zero-shot-classification", model=model_name, device=device)
+        self.cache = cache
+        self.engine = get_engine(model_name, device=device, labels=CANDIDATE_LABELS,
+                                 hypothesis_template=hypothesis_template, backend=backend)
 
     def score_difficulty(self, text):
         """
@@ -25,47 +44,260 @@ class DifficultyScorer:
         Returns:
             float: The difficulty score, or NaN for empty inputs.
         """
-        if not text or pd.isna(text):
-            return np.nan
-        result = self.classifier(text, ["Easy", "Hard to Know"])
-        # Return the score for "Hard to Know" as the difficulty score
-        return result['scores'][result['labels'].index("Hard to Know")]
+        return self.score_batch([text], batch_size=1)[0]
+
+    def score_batch(self, texts, batch_size=32):
+        """
+        Scores many texts for difficulty in padded batches.
+
+        Args:
+            texts (iterable): The texts to classify.
+            batch_size (int): Number of texts per forward batch.
+
+        Returns:
+            list: "Hard to Know" scores aligned with texts; NaN for empty inputs or failed texts.
+        """
+        _, scores = self.engine.classify(texts, batch_size=batch_size, cache=self.cache)
+        return scores
+
+def score_shard(shard_id, rows, out_path, model_name, backend, batch_size, threads, cache_path):
+    """
+    Scores one shard in a worker process and streams (row, score) lines to out_path.
+
+    Rows already present in out_path (from an interrupted run) are skipped.
+
+    Args:
+        shard_id (int): Shard number, for progress output.
+        rows (list): (row index, text) pairs.
+        out_path (str): Per-shard JSON Lines output.
+        model_name (str): Hugging Face model name.
+        backend (str): Inference backend name.
+        batch_size (int): Texts per forward batch.
+        threads (int): Torch intra-op threads pinned for this worker.
+        cache_path (str): Score cache path, or None to disable the cache.
+
+    Returns:
+        tuple: (shard_id, number of rows scored in this call)
+    """
+    # Must be set before torch is first imported in this process
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+    if os.path.exists(out_path):
+        done = {record['row'] for record in iter_jsonl(out_path)}
+        rows = [(row, text) for row, text in rows if row not in done]
+
+    cache = ScoreCache(cache_path) if cache_path else None
+    scorer = DifficultyScorer(model_name=model_name, device=-1, cache=cache, backend=backend)
+    chunk_size = batch_size * 8
+    with JsonLinesSink(out_path, mode='a') as sink:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            scores = scorer.score_batch([text for _, text in chunk], batch_size=batch_size)
+            for (row, _), score in zip(chunk, scores):
+                sink.write({'row': row, 'score': None if math.isnan(score) else score})
+            print(f"Shard {shard_id}: scored {min(start + chunk_size, len(rows))}/{len(rows)}")
+    if cache is not None:
+        cache.close()
+    return shard_id, len(rows)
+
+
+def merge_shards(paths, n_rows):
+    """
+    Merges per-shard outputs into one score list ordered by row index.
+
+    Returns:
+        list: Scores aligned with the input rows; NaN for rows without a score.
+    """
+    scores = [np.nan] * n_rows
+    for path in sorted(paths):
+        for record in iter_jsonl(path):
+            scores[record['row']] = np.nan if record['score'] is None else record['score']
+    return scores
+
+
+def input_fingerprint(texts, model_name, backend):
+    """
+    Hashes everything a shard record depends on: the texts in row order, the model, the backend and the hypotheses.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    digest = hashlib.sha256(json.dumps([model_name, backend, CANDIDATE_LABELS, HYPOTHESIS_TEMPLATE]).encode('utf-8'))
+    for text in texts:
+        digest.update(json.dumps(text if isinstance(text, str) else None, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def score_sharded(texts, shards, model_name, backend, batch_size, cache_path, shard_dir, threads=None):
+    """
+    Splits texts into contiguous shards, scores them in parallel worker processes and merges the results.
+
+    Shard records are keyed by row position, so shard_dir also holds the input fingerprint;
+    leftover shards from a run over different input (a new scrape, another order, another
+    model) are discarded instead of being merged onto the wrong rows.
+
+    Args:
+        texts (list): Texts to score.
+        shards (int): Number of worker processes.
+        threads (int): Torch threads per worker; defaults to an even split of the CPU cores.
+
+    Returns:
+        list: Scores aligned with texts.
+    """
+    threads = threads or max(1, (os.cpu_count() or 1) // shards)
+    fingerprint = input_fingerprint(texts, model_name, backend)
+    fingerprint_path = os.path.join(shard_dir, 'fingerprint')
+    if os.path.isdir(shard_dir):
+        previous = None
+        if os.path.exists(fingerprint_path):
+            with open(fingerprint_path, encoding='utf-8') as f:
+                previous = f.read().strip()
+        if previous != fingerprint:
+            print(f"Discarding shards in {shard_dir}: they were scored from different input.")
+            shutil.rmtree(shard_dir)
+    os.makedirs(shard_dir, exist_ok=True)
+    with open(fingerprint_path, 'w', encoding='utf-8') as f:
+        f.write(fingerprint)
+    shard_size = math.ceil(len(texts) / shards) if texts else 0
+    paths = [os.path.join(shard_dir, f"shard_{i:03d}.jsonl") for i in range(shards)]
+    rows = list(enumerate(texts))
+
+    # spawn rather than fork: each worker builds its own torch state and thread pool
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=shards, mp_context=context) as executor:
+        futures = [
+            executor.submit(score_shard, i, rows[i * shard_size:(i + 1) * shard_size], paths[i],
+                            model_name, backend, batch_size, threads, cache_path)
+            for i in range(shards)
+        ]
+        for future in as_completed(futures):
+            shard_id, scored = future.result()
+            print(f"Shard {shard_id} finished ({scored} rows scored).")
+
+    scores = merge_shards(paths, len(texts))
+    shutil.rmtree(shard_dir)
+    return scores
 
 def main():
-    # Load the cleaned JSON data into a pandas DataFrame
-    df = pd.read_json('snopes_fact_checks_cleaned.json', orient='records')
+    parser = argparse.ArgumentParser(description="Score fact-check summaries for difficulty.")
+    parser.add_argument('--input', default=DATASET_DIR,
+                        help="Corpus to score, streamed in chunks: a Parquet dataset (updated in place), "
+                             "or a .parquet, .jsonl or .json file.")
+    parser.add_argument('--output', default=None,
+                        help="CSV to write (default for file inputs: snopes_fact_checks_with_difficulty_score.csv; "
+                             "optional export for datasets).")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Rows read and written per chunk.")
+    parser.add_argument('--batch-size', type=int, default=32, help="Summaries per forward batch.")
+    parser.add_argument('--backend', default='torch', choices=list(BACKENDS),
+                        help="Inference backend: fp32 torch, dynamically quantized int8 torch, or ONNX Runtime.")
+    parser.add_argument('--cache', default='score_cache.sqlite', help="Persistent score cache path.")
+    parser.add_argument('--no-cache', action='store_true', help="Score every summary, ignoring the cache.")
+    parser.add_argument('--cache-max-entries', type=int, default=None,
+                        help="Evict least recently used cache entries beyond this count.")
+    parser.add_argument('--cache-max-age-days', type=float, default=None,
+                        help="Evict cache entries unused for this many days.")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="Score in this many worker processes (1 scores in-process).")
+    parser.add_argument('--threads-per-shard', type=int, default=None,
+                        help="Torch threads per shard worker (default: CPU cores / shards).")
+    parser.add_argument('--shard-dir', default='score_shards',
+                        help="Directory for per-shard outputs; kept until the merge succeeds so runs can resume.")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented(args):
+        run(args)
+
+
+def run(args):
+    """
+    Scores the input corpus and writes the scores back for the parsed arguments.
+    """
+
+    cache = None if args.no_cache else ScoreCache(args.cache)
 
     # Initialize the DifficultyScorer
-    scorer = DifficultyScorer(model_name="facebook/bart-large-mnli", device=-1)
+    scorer = DifficultyScorer(model_name="facebook/bart-large-mnli", device=-1, cache=cache, backend=args.backend)
+
+    is_dataset = os.path.isdir(args.input)
+    if not is_dataset and args.output is None:
+        args.output = 'snopes_fact_checks_with_difficulty_score.csv'
 
     print("Calculating difficulty scores. This may take a while...")
-    
-    def safe_score(x):
-        try:
-            return scorer.score_difficulty(x)
-        except Exception as e:
-            print(f"Error scoring: {x}")
-            print(f"Error message: {str(e)}")
-            return np.nan
+    if args.shards > 1:
+        # Shards split the whole input up front, so only the Summary column (plus the URL key of a
+        # dataset) is collected first; ArticleContent stays on disk until the write pass
+        urls, texts = [], []
+        for chunk in iter_frames(args.input, columns=['URL', 'Summary'] if is_dataset else ['Summary'],
+                                 chunk_size=args.chunk_size):
+            texts.extend(chunk['Summary'])
+            if is_dataset:
+                urls.extend(chunk['URL'])
+        with METRICS.stage('scoring') as stage:
+            scores = score_sharded(
+                texts, args.shards, "facebook/bart-large-mnli", args.backend, args.batch_size,
+                None if args.no_cache else args.cache, args.shard_dir, threads=args.threads_per_shard,
+            )
+            stage.items = len(scores)
+        scores_by_url = dict(zip(urls, scores))
+        remaining = iter(scores)
+
+        def frame_scores(frame):
+            if is_dataset:
+                return frame['URL'].map(scores_by_url)
+            return [next(remaining) for _ in range(len(frame))]
+    else:
+        scores = []
 
-    df['Difficulty_Score'] = df['Summary'].apply(safe_score)
+        def frame_scores(frame):
+            start = len(scores)
+            for offset in range(0, len(frame), args.chunk_size):
+                with METRICS.stage('scoring') as stage:
+                    summaries = frame['Summary'].iloc[offset:offset + args.chunk_size]
+                    scores.extend(scorer.score_batch(summaries, batch_size=args.batch_size))
+                    stage.items += len(summaries)
+                print(f"Scored {len(scores)} summaries")
+            return scores[start:]
 
-    # Display the first few rows to verify
-    print(df[['Title', 'Summary', 'Difficulty_Score']].head())
+    if is_dataset:
+        # Each month partition is scored and written back before the next one is read, so an
+        # interrupted run keeps the partitions it finished. Only URL and Summary are loaded;
+        # ArticleContent and the other columns are copied through as Arrow data.
+        with METRICS.stage('dataset') as stage:
+            update_column('Difficulty_Score', frame_scores, ['URL', 'Summary'], args.input)
+            stage.items = len(scores)
+        print(f"Scoring complete. Saved to the {args.input} dataset.")
+        if args.output:
+            export(args.input, csv_path=args.output)
+            print(f"Exported to '{args.output}'.")
+    else:
+        # One pass over the full records: each chunk is scored and appended to the CSV
+        for i, chunk in enumerate(iter_frames(args.input, chunk_size=args.chunk_size)):
+            chunk['Difficulty_Score'] = frame_scores(chunk)
+            with METRICS.stage('write') as stage:
+                chunk.to_csv(args.output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+                stage.items += len(chunk)
+            if i == 0:
+                # Display the first few rows to verify
+                print(chunk[['Title', 'Summary', 'Difficulty_Score']].head())
+        print(f"Scoring complete. Saved to '{args.output}'.")
 
-    # Save the updated DataFrame to a new CSV file
-    df.to_csv('snopes_fact_checks_with_difficulty_score.csv', index=False)
-    print("Scoring complete. Saved to 'snopes_fact_checks_with_difficulty_score.csv'.")
+    if cache is not None:
+        removed = cache.evict(max_entries=args.cache_max_entries, max_age_days=args.cache_max_age_days)
+        print(f"Evicted {removed} stale score cache entries.")
+        cache.close()
 
+    scores = pd.Series(scores, name='Difficulty_Score', dtype=float)
     print("\nDifficulty Score Statistics:")
-    print(df['Difficulty_Score'].describe())
+    print(scores.describe())
 
     # Example of how you might categorize based on the score
     print("\nExample categorization:")
-    df['Difficulty_Category'] = pd.cut(df['Difficulty_Score'], 
-                                       bins=[0, 0.33, 0.66, 1], 
-                                       labels=['Easy', 'Medium', 'Hard'])
-    print(df['Difficulty_Category'].value_counts(normalize=True))
+    categories = pd.cut(scores, bins=[0, 0.33, 0.66, 1], labels=['Easy', 'Medium', 'Hard'])
+    print(categories.value_counts(normalize=True))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,295 @@
+"""
+Pipeline metrics.
+
+A process-wide registry of counters and latency histograms that the fetcher, parse pool,
+zero-shot engine and uploader record into, plus wall-clock stages with throughput. The
+scripts write it out as a JSON summary and in the Prometheus text format (for the
+node_exporter textfile collector or a push gateway):
+
+    python scraper.py --metrics metrics/scraper.json --profile scraper.prof
+"""
+import bisect
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a cached page parse to a slow model batch or upsert
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PREFIX = 'snopes_'
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    # Label values in the text format escape backslash, double quote and line feed
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name, labels, extra=(), quote='"'):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return name
+    if quote:
+        pairs = [(key, _escape(value)) for key, value in pairs]
+    return name + '{' + ','.join(f'{key}={quote}{value}{quote}' for key, value in pairs) + '}'
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Fixed-bucket histogram, as in Prometheus: observations are counted per upper bound.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Returns:
+            float: Upper bound of the bucket holding the q-quantile (the largest bound for the overflow bucket).
+        """
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class Stage:
+    def __init__(self):
+        """
+        Wall time and item count of one pipeline stage; code inside the stage adds to items.
+        """
+        self.seconds = 0.0
+        self.items = 0
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Thread-safe registry of labelled counters, gauges, histograms and stages.
+
+        Recording is a lock and a dict update, cheap enough for every request, parse and batch.
+        """
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        """
+        Sets a value that can go down as well as up (a size, a peak, a duration so far).
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Observes the duration of the with-block in the `name` histogram.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times a pipeline stage.
+
+        Yields:
+            Stage: Add the number of items processed to .items to get a throughput.
+        """
+        with self._lock:
+            stage = self.stages.setdefault(name, Stage())
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.stages.clear()
+
+    def summary(self):
+        """
+        Returns:
+            dict: JSON-ready counters, gauges, histogram statistics (count, sum, mean, p50/p95/p99 bucket bounds)
+                and stages with items per second.
+        """
+        with self._lock:
+            return {
+                'counters': {
+                    _series(name, labels, quote=''): value for (name, labels), value in sorted(self.counters.items())
+                },
+                'gauges': {
+                    _series(name, labels, quote=''): value for (name, labels), value in sorted(self.gauges.items())
+                },
+                'histograms': {
+                    _series(name, labels, quote=''): {
+                        'count': histogram.count,
+                        'sum': round(histogram.sum, 6),
+                        'mean': histogram.sum / histogram.count if histogram.count else None,
+                        'p50': histogram.quantile(0.5),
+                        'p95': histogram.quantile(0.95),
+                        'p99': histogram.quantile(0.99),
+                    }
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                },
+                'stages': {
+                    name: {
+                        'seconds': round(stage.seconds, 3),
+                        'items': stage.items,
+                        'per_second': stage.items / stage.seconds if stage.seconds else None,
+                    }
+                    for name, stage in self.stages.items()
+                },
+            }
+
+    def prometheus(self, prefix=PREFIX):
+        """
+        Returns:
+            str: All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f'# TYPE {prefix}{name} counter')
+                    typed.add(name)
+                lines.append(f'{_series(prefix + name, labels)} {value}')
+            for (name, labels), value in sorted(self.gauges.items()):
+                if name not in typed:
+                    lines.append(f'# TYPE {prefix}{name} gauge')
+                    typed.add(name)
+                lines.append(f'{_series(prefix + name, labels)} {value}')
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f'# TYPE {prefix}{name} histogram')
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{_series(prefix + name + "_bucket", labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{_series(prefix + name + "_sum", labels)} {histogram.sum}')
+                lines.append(f'{_series(prefix + name + "_count", labels)} {histogram.count}')
+            if self.stages:
+                lines.append(f'# TYPE {prefix}stage_seconds gauge')
+                lines.extend(f'{_series(prefix + "stage_seconds", [("stage", name)])} {stage.seconds}'
+                             for name, stage in self.stages.items())
+                lines.append(f'# TYPE {prefix}stage_items gauge')
+                lines.extend(f'{_series(prefix + "stage_items", [("stage", name)])} {stage.items}'
+                             for name, stage in self.stages.items())
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_path, prometheus_path=None):
+        """
+        Writes the JSON summary and the Prometheus text file.
+
+        Args:
+            json_path (str): Destination of the JSON summary.
+            prometheus_path (str): Destination of the Prometheus text; defaults to json_path with a .prom suffix.
+        """
+        prometheus_path = prometheus_path or os.path.splitext(json_path)[0] + '.prom'
+        for path in (json_path, prometheus_path):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(prometheus_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+
+
+# The registry every module records into
+METRICS = Metrics()
+
+
+@contextmanager
+def profiled(path):
+    """
+    Profiles the with-block when path is set: cProfile stats for .prof/.pstats files,
+    a pyinstrument HTML report for .html (pyinstrument must be installed).
+    """
+    if not path:
+        yield
+        return
+    if path.endswith('.html'):
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            print(f"Profile written to {path}")
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Profile written to {path} (inspect with python -m pstats {path})")
+
+
+def add_arguments(parser):
+    """
+    Adds the --metrics and --profile options shared by the pipeline scripts.
+    """
+    parser.add_argument('--metrics', default=None,
+                        help="Write per-stage metrics to this JSON file and a .prom file next to it.")
+    parser.add_argument('--profile', default=None,
+                        help="Profile the run into this file: cProfile for .prof, pyinstrument for .html.")
+
+
+@contextmanager
+def instrumented(args):
+    """
+    Runs a script's main work under the --profile profiler and writes --metrics at the end, also on errors.
+    """
+    try:
+        with profiled(args.profile):
+            yield METRICS
+    finally:
+        if args.metrics:
+            METRICS.write(args.metrics)
+            print(f"Metrics written to {args.metrics}")
@@ -0,0 +1,24 @@
+-- Unique key for upserts on questions."URL".
+--
+-- upload_db.py upserts with on_conflict=URL, which PostgREST turns into
+-- INSERT ... ON CONFLICT ("URL"); without a unique constraint on the column every
+-- batch is rejected (PostgreSQL error 42P10) and the uploader aborts.
+--
+-- Apply once, before the first upload_db.py run against an existing table, e.g. in the
+-- Supabase SQL editor or with: psql "$DATABASE_URL" -f migrations/questions_url_unique.sql
+-- The next upload_db.py run then reconciles its sync manifest with the rows already in
+-- the table (see upload_db.reconcile_manifest).
+
+BEGIN;
+
+-- Rows from the Title-keyed uploads can repeat a URL; keep one copy of each (the next
+-- upload_db.py run overwrites it with the current dataset row).
+DELETE FROM questions AS older
+USING questions AS newer
+WHERE older."URL" = newer."URL"
+  AND older.ctid < newer.ctid;
+
+ALTER TABLE questions
+    ADD CONSTRAINT questions_url_key UNIQUE ("URL");
+
+COMMIT;
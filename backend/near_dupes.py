@@ -0,0 +1,261 @@
+"""
+Near-duplicate claim detection.
+
+Snopes often re-checks the same claim under a new URL. This stage groups fact checks whose
+claim text is nearly the same (MinHash over word shingles, LSH banding for candidate
+pairs) and stores each cluster's canonical URL, the earliest published member, in the
+dataset's Canonical_URL column. Only canonical rows are served and uploaded
+(ratings.served_filter()).
+
+Usage:
+    python near_dupes.py --dataset snopes_dataset --threshold 0.6
+"""
+import argparse
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from ratings import CANONICAL, SERVED_CATEGORIES
+from storage import DATASET_DIR, map_partitions, read_dataset
+from tag_index import TAG_INDEX_PATH, TagIndex
+
+def claim_texts(frame):
+    """
+    The text a fact check is compared by: its Claim, else its Summary, else its Title.
+
+    Returns:
+        Series: Lower-cased texts with punctuation and whitespace runs collapsed to one space.
+    """
+    text = pd.Series('', index=frame.index, dtype=object)
+    for column in ('Title', 'Summary', 'Claim'):
+        if column in frame:
+            values = frame[column]
+            present = values.notna() & (values != 'N/A') & (values.astype(str).str.strip() != '')
+            text = text.where(~present, values)
+    return text.map(lambda value: re.sub(r'\W+', ' ', value.lower()).strip())
+
+
+def shingle(texts, k=2):
+    """
+    Hashes the overlapping k-word shingles of every text in one vectorized pass.
+
+    Words are numbered once for the whole corpus; each window of k word numbers is then
+    combined into one hash, skipping windows that straddle two texts.
+
+    Args:
+        texts (list): Normalized texts.
+        k (int): Shingle length in words.
+
+    Returns:
+        tuple: (row ids, uint64 shingle hashes), both sorted by row.
+    """
+    words = [text.split() for text in texts]
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    word_ids = pd.factorize(pd.Series(list(chain.from_iterable(words)), dtype=object))[0].astype(np.uint64)
+    counts = np.maximum(lengths - k + 1, 0)
+
+    rows = np.repeat(np.arange(len(words)), counts)
+    # Window start = start of the text's words + position within the text
+    text_starts = np.cumsum(lengths) - lengths
+    first_window = np.cumsum(counts) - counts
+    starts = np.repeat(text_starts - first_window, counts) + np.arange(counts.sum())
+
+    hashes = np.zeros(len(starts), dtype=np.uint64)
+    for offset in range(k):
+        hashes = (hashes ^ word_ids[starts + offset]) * np.uint64(0x100000001B3)
+    return rows, hashes
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, seed=1):
+        """
+        MinHash signatures with multiply-add hashing: h(x) = a * x + b mod 2**64 for random odd a.
+
+        Args:
+            num_perm (int): Signature length; the Jaccard estimate's error is about 1 / sqrt(num_perm).
+            seed (int): Seed of the hash family; signatures are only comparable with the same seed.
+        """
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+
+    def signatures(self, texts, k=2, chunk_shingles=100000):
+        """
+        Args:
+            texts (list): Normalized texts.
+            k (int): Shingle length in words.
+            chunk_shingles (int): Shingles hashed at once; bounds memory to num_perm * 8 bytes each.
+
+        Returns:
+            ndarray: (len(texts), num_perm) uint32 signatures (the high half of each minimum).
+                Texts with fewer than k words have all-max rows.
+        """
+        rows, hashes = shingle(texts, k)
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        values = np.empty((self.num_perm, min(chunk_shingles, len(rows))), dtype=np.uint64)
+        start = 0
+        while start < len(rows):
+            # Cut chunks at row boundaries so every row's minimum is taken in one piece
+            end = min(start + chunk_shingles, len(rows))
+            if end < len(rows):
+                end = np.searchsorted(rows, rows[end], side='left')
+                if end == start:
+                    end = np.searchsorted(rows, rows[start], side='right')
+            chunk_rows = rows[start:end]
+            if end - start > values.shape[1]:
+                values = np.empty((self.num_perm, end - start), dtype=np.uint64)
+            chunk = values[:, :end - start]
+            np.multiply(self.a[:, None], hashes[None, start:end], out=chunk)
+            chunk += self.b[:, None]
+            boundaries = np.flatnonzero(np.r_[True, chunk_rows[1:] != chunk_rows[:-1]])
+            minima = np.minimum.reduceat(chunk, boundaries, axis=1)
+            signatures[chunk_rows[boundaries]] = (minima >> np.uint64(32)).astype(np.uint32).T
+            start = end
+        return signatures
+
+
+def lsh_pairs(signatures, bands=32, threshold=0.6, seed=1, max_bucket=16):
+    """
+    Finds pairs of rows whose signatures agree on at least `threshold` of their positions.
+
+    Every band of rows-per-band signature values is hashed into a bucket. Within a bucket of
+    up to max_bucket members every pair is compared, so a pair that shares such a bucket in
+    any band becomes a candidate: with 32 bands of 4 values, pairs at Jaccard 0.6 are found
+    99% of the time. In larger buckets (boilerplate claims) each member is compared with the
+    max_bucket - 1 members before it and with the bucket's first member, so a band costs
+    O(N log N + N * max_bucket) however skewed the buckets are; similar members are still
+    linked through the first one by the union-find in clusters().
+
+    Args:
+        signatures (ndarray): (N, num_perm) MinHash signatures; num_perm must be divisible by bands.
+        bands (int): Number of LSH bands.
+        threshold (float): Minimum estimated Jaccard similarity.
+        seed (int): Seed of the band hash.
+        max_bucket (int): Largest bucket whose members are all compared pairwise.
+
+    Returns:
+        ndarray: (M, 2) unique row pairs (i < j).
+    """
+    n, num_perm = signatures.shape
+    rows_per_band = num_perm // bands
+    multipliers = np.random.default_rng(seed).integers(1, 2**63, rows_per_band, dtype=np.uint64) | np.uint64(1)
+    # Rows without shingles have identical all-max signatures; they must not cluster together
+    valid = np.flatnonzero((signatures != np.iinfo(np.uint32).max).any(axis=1))
+    pairs = []
+    if not len(valid):
+        return np.empty((0, 2), dtype=np.int64)
+    for band in range(bands):
+        values = signatures[valid, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        keys = (values * multipliers).sum(axis=1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        run_start = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        run_id = np.cumsum(run_start) - 1
+        run_first = np.flatnonzero(run_start)[run_id]
+        firsts, seconds = [], []
+        for offset in range(1, min(max_bucket, len(order))):
+            same = run_id[offset:] == run_id[:-offset]
+            if not same.any():
+                # No bucket has more than offset members
+                break
+            firsts.append(order[:-offset][same])
+            seconds.append(order[offset:][same])
+        far = np.arange(len(order)) - run_first >= max_bucket
+        firsts.append(order[run_first[far]])
+        seconds.append(order[far])
+        firsts, seconds = valid[np.concatenate(firsts)], valid[np.concatenate(seconds)]
+        if not len(firsts):
+            continue
+        similarity = (signatures[firsts] == signatures[seconds]).mean(axis=1)
+        keep = similarity >= threshold
+        pairs.append(np.sort(np.stack([firsts[keep], seconds[keep]], axis=1), axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def clusters(n, pairs):
+    """
+    Connected components of the pair graph (union-find).
+
+    Returns:
+        ndarray: Cluster label per row, the smallest row index in its cluster.
+    """
+    parent = list(range(n))
+
+    def find(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    for i, j in pairs.tolist():
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    return np.array([find(row) for row in range(n)])
+
+
+def canonical_urls(frame, threshold=0.6, num_perm=128, bands=32, k=2):
+    """
+    Clusters near-duplicate fact checks and picks the canonical URL of each cluster.
+
+    Args:
+        frame (DataFrame): Rows with URL, Date and Claim/Summary/Title.
+        threshold (float): Minimum estimated Jaccard similarity of two claims' shingles.
+        num_perm (int): MinHash signature length.
+        bands (int): LSH bands.
+        k (int): Shingle length in words.
+
+    Returns:
+        Series: Canonical URL per row, indexed like frame: the earliest published URL of its cluster
+            (ties broken by URL), or the row's own URL when it has no near-duplicates.
+    """
+    frame = frame.reset_index(drop=True)
+    signatures = MinHasher(num_perm).signatures(claim_texts(frame).tolist(), k=k)
+    labels = clusters(len(frame), lsh_pairs(signatures, bands=bands, threshold=threshold))
+    order = pd.DataFrame({
+        'label': labels,
+        'published': pd.to_datetime(frame['Date'].where(frame['Date'] != 'N/A'), errors='coerce', utc=True,
+                                    format='mixed'),
+        'URL': frame['URL'],
+    }).sort_values(['published', 'URL'], na_position='last')
+    return order.groupby('label')['URL'].transform('first').sort_index()
+
+
+def assign_canonical(root=DATASET_DIR, threshold=0.6):
+    """
+    Recomputes the Canonical_URL column of the dataset.
+
+    Only Fake/Real rows take part, so a served question is never hidden behind an Ambiguous
+    duplicate; Ambiguous rows get a null Canonical_URL.
+
+    Returns:
+        tuple: (number of rows compared, number of rows marked as duplicates).
+    """
+    frame = read_dataset(root, columns=['URL', 'Date', 'Title', 'Summary', 'Claim'],
+                         filter=ds.field('Category').isin(list(SERVED_CATEGORIES)))
+    canonical = dict(zip(frame['URL'], canonical_urls(frame, threshold=threshold)))
+    map_partitions(lambda partition: partition.assign(**{CANONICAL: partition['URL'].map(canonical)}), root)
+    return len(frame), sum(url != canonical_url for url, canonical_url in canonical.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mark near-duplicate fact checks in the dataset.")
+    parser.add_argument('--dataset', default=DATASET_DIR, help="Parquet dataset to update.")
+    parser.add_argument('--tag-index', default=TAG_INDEX_PATH, help="Tag index to rebuild for the served rows.")
+    parser.add_argument('--threshold', type=float, default=0.6,
+                        help="Minimum estimated Jaccard similarity of two claims to count as duplicates.")
+    args = parser.parse_args()
+
+    rows, duplicates = assign_canonical(args.dataset, args.threshold)
+    print(f"Marked {duplicates} of {rows} fact checks as near-duplicates")
+    TagIndex.from_dataset(args.dataset).save(args.tag_index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+from collections import deque
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from metrics import METRICS
+
+
+def _timed(func, *args):
+    # Runs in the worker, so the measured time is parsing only, without queueing
+    start = time.perf_counter()
+    return func(*args), time.perf_counter() - start
+
+
+class ParsePool:
+    def __init__(self, workers=None, max_pending=None, ordered=False):
+        """
+        Runs CPU-bound parsing in worker processes, decoupled from the network threads.
+
+        Producers hand over raw payloads (e.g. HTML bytes); at most `max_pending` of them are
+        queued or being parsed at once. When the queue is full, map() stops pulling from its
+        input until a worker finishes. That backpressure reaches the fetcher, which stops
+        downloading once its own buffer is full.
+
+        Args:
+            workers (int): Worker processes; defaults to the CPU count. 0 parses in-process.
+            max_pending (int): Bound on queued + in-flight payloads; defaults to 4 per worker.
+            ordered (bool): Yield results in input order instead of completion order.
+        """
+        self.workers = os.cpu_count() if workers is None else workers
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.ordered = ordered
+        self._executor = None
+        if self.workers > 0:
+            # Forking a process that already runs fetcher threads can deadlock; forkserver children start clean
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def map(self, func, items):
+        """
+        Applies func to every payload.
+
+        Args:
+            func (callable): A picklable, module-level function.
+            items (iterable): (key, args) pairs; args is the tuple passed to func. Keys stay in this process.
+
+        Yields:
+            tuple: (key, result, error) where error is the exception raised by func, if any.
+        """
+        name = getattr(func, '__name__', 'parse')
+        if self._executor is None:
+            for key, args in items:
+                yield self._record(name, key, *self._call(func, args))
+            return
+
+        pending = deque()
+        for key, args in items:
+            pending.append((key, name, self._executor.submit(_timed, func, *args)))
+            if len(pending) >= self.max_pending:
+                yield from self._drain(pending, block=True)
+            else:
+                yield from self._drain(pending, block=False)
+        while pending:
+            yield from self._drain(pending, block=True)
+
+    def _drain(self, pending, block):
+        if self.ordered:
+            # Only the head of the queue may be released in ordered mode
+            while pending and (block or pending[0][2].done()):
+                yield self._result(*pending.popleft())
+                block = False
+            return
+
+        if block:
+            wait([future for _, _, future in pending], return_when=FIRST_COMPLETED)
+        done = [item for item in pending if item[2].done()]
+        for item in done:
+            pending.remove(item)
+            yield self._result(*item)
+
+    @staticmethod
+    def _call(func, args):
+        try:
+            return _timed(func, *args), None
+        except Exception as e:
+            return None, e
+
+    @classmethod
+    def _result(cls, key, name, future):
+        try:
+            return cls._record(name, key, future.result(), None)
+        except Exception as e:
+            return cls._record(name, key, None, e)
+
+    @staticmethod
+    def _record(name, key, timed, error):
+        if error is not None:
+            METRICS.count('parse_errors_total', func=name)
+            return key, None, error
+        result, seconds = timed
+        METRICS.observe('parse_seconds', seconds, func=name)
+        return key, result, None
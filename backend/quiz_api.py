@@ -0,0 +1,310 @@
+"""
+Quiz question API.
+
+Loads the fact-check dataset and its tag index once, indexes the question IDs by
+(category, publish month) and serves random quiz samples, so the frontend no longer
+downloads the whole questions table to shuffle it on the client.
+
+Usage:
+    python quiz_api.py --dataset snopes_dataset --port 8000
+
+    GET /questions?n=20&tag=politics&range=year&exclude=8d2f0c1e9a4b7e35,03c9e1f6b2a84d70
+    GET /questions?tag=covid-19,vaccines&match=all
+    GET /questions?since=2024-01-01&until=2024-06-30
+    GET /tags
+    GET /health
+
+With --reload-interval the dataset is polled and the index rebuilt in the background
+when the crawl pipeline appends new fact checks.
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from ratings import SERVED_CATEGORIES, categorize_rating, served_filter
+from storage import DATASET_DIR, PARTITION, UNKNOWN_MONTH, read_dataset, signature
+from tag_index import TAG_INDEX_PATH, TagIndex
+
+# Fields sent to the client; ArticleContent stays on the server
+QUESTION_FIELDS = ['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags', 'Claim',
+                   'Context', 'Difficulty', 'Difficulty_Score']
+# Relative date ranges the frontend offers, in days
+RANGES = {'month': 31, '3months': 92, 'year': 365}
+
+
+def question_id(url):
+    """
+    Returns:
+        str: The public ID of the question at url: 16 hex digits of its SHA-256, the same on every load.
+    """
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+
+
+class QuizIndex:
+    def __init__(self, questions, tag_index=None):
+        """
+        In-memory question store and sampler.
+
+        Internally questions are numbered by position in the URL-sorted list of served
+        questions, the numbering the ingest-time TagIndex uses. Positions shift when new fact
+        checks are appended, so clients see question_id(URL) instead, which stays the same
+        across reloads; exclude sets are given in those IDs. Untagged queries draw from
+        (category, month) buckets; tag queries draw from the intersection of the tags'
+        posting lists.
+
+        Args:
+            questions (list): Question dicts with the QUESTION_FIELDS plus 'Month' ('YYYY-MM'); Ambiguous
+                ones are dropped.
+            tag_index (TagIndex): Prebuilt tag index; rebuilt from the questions when missing or stale.
+        """
+        for question in questions:
+            # Rows read from the dataset carry the Category computed at ingest
+            question['Category'] = question.get('Category') or categorize_rating(question['Rating'])
+        questions = sorted((question for question in questions if question['Category'] in SERVED_CATEGORIES),
+                           key=lambda question: question['URL'])
+        published = pd.to_datetime(pd.Series([question['Date'] for question in questions], dtype=object),
+                                   errors='coerce', utc=True, format='mixed')
+        self.dates = [None if pd.isna(day) else day.date() for day in published]
+        if tag_index is None or tag_index.urls != [question['URL'] for question in questions]:
+            tag_index = TagIndex.build((question['URL'], question['Tags']) for question in questions)
+        self.tag_index = tag_index
+
+        self.questions = []
+        self.categories = []
+        self.positions = {}
+        self.buckets = {}
+        self.months = set()
+        for position, question in enumerate(questions):
+            category = question.pop('Category')
+            month = question.pop(PARTITION)
+            public_id = question_id(question['URL'])
+            self.categories.append(category)
+            self.positions[public_id] = position
+            self.questions.append({'id': public_id, 'category': category, **question})
+            self.buckets.setdefault((category, month), []).append(position)
+            self.months.add(month)
+        # Dated months only, for bisecting date ranges; undated questions sit in UNKNOWN_MONTH
+        self.months = sorted(self.months - {UNKNOWN_MONTH})
+
+    @classmethod
+    def from_dataset(cls, root=DATASET_DIR, tag_index_path=TAG_INDEX_PATH):
+        """
+        Builds the index from the Parquet dataset, reading only the served columns of the
+        Fake/Real rows, and the tag index the ingest pipeline saved next to it.
+        """
+        frame = read_dataset(root, columns=QUESTION_FIELDS + ['Category', PARTITION], filter=served_filter())
+        frame = frame.astype(object).where(frame.notna(), None)
+        tag_index = TagIndex.load(tag_index_path) if os.path.exists(tag_index_path) else None
+        return cls(frame.to_dict('records'), tag_index)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def _pools(self, tags, match, since, until, categories):
+        if tags:
+            return [self.tag_index.query(tags, match=match)]
+        low = bisect.bisect_left(self.months, since.strftime('%Y-%m')) if since else 0
+        high = bisect.bisect_right(self.months, until.strftime('%Y-%m')) if until else len(self.months)
+        # Undated questions only match when no range is given, so their bucket is not drawn
+        # from otherwise (every draw from it would be rejected by _matches)
+        selected = self.months[low:high] if since or until else [*self.months, UNKNOWN_MONTH]
+        return [
+            self.buckets[(category, month)]
+            for category in categories for month in selected if (category, month) in self.buckets
+        ]
+
+    def _matches(self, position, since, until, categories):
+        if self.categories[position] not in categories:
+            return False
+        published = self.dates[position]
+        if since is None and until is None:
+            return True
+        return published is not None and (since is None or published >= since) and (until is None or published <= until)
+
+    def sample(self, n, tags=None, match='all', since=None, until=None, exclude=(),
+               categories=SERVED_CATEGORIES, rng=random):
+        """
+        Draws up to n distinct random questions matching the filters.
+
+        Pools (buckets or a tag posting list) are picked in proportion to their size and an
+        ID is drawn from each, so a draw costs O(n) instead of a scan over the table. When
+        the exclude set or the other filters reject too many draws, the candidates are
+        enumerated instead.
+
+        Args:
+            n (int): Number of questions.
+            tags (list): Only questions with these tags (case-insensitive).
+            match (str): 'all' requires every tag, 'any' at least one.
+            since (date): Earliest publish date.
+            until (date): Latest publish date.
+            exclude (set): IDs (question_id()) of questions not to return.
+            categories (tuple): Categories to draw from.
+            rng (random.Random): Random source.
+
+        Returns:
+            list: Question dicts.
+        """
+        pools = self._pools(tags, match, since, until, categories)
+        exclude = {self.positions[public_id] for public_id in exclude if public_id in self.positions}
+        offsets = []
+        total = 0
+        for pool in pools:
+            offsets.append(total)
+            total += len(pool)
+
+        chosen = []
+        seen = set()
+        for _ in range(4 * n + 16):
+            if len(chosen) == n or not total:
+                break
+            position = rng.randrange(total)
+            index = bisect.bisect_right(offsets, position) - 1
+            drawn = int(pools[index][position - offsets[index]])
+            if drawn in seen:
+                continue
+            seen.add(drawn)
+            if drawn not in exclude and self._matches(drawn, since, until, categories):
+                chosen.append(drawn)
+        else:
+            candidates = [
+                candidate for pool in pools for candidate in map(int, pool)
+                if candidate not in exclude and candidate not in seen
+                and self._matches(candidate, since, until, categories)
+            ]
+            chosen.extend(rng.sample(candidates, min(n - len(chosen), len(candidates))))
+        return [self.questions[position] for position in chosen]
+
+
+def parse_query(query):
+    """
+    Turns the query string of /questions into sample() arguments.
+
+    Raises:
+        ValueError: On malformed numbers, dates or ranges.
+    """
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    since = date.fromisoformat(params['since']) if params.get('since') else None
+    until = date.fromisoformat(params['until']) if params.get('until') else None
+    date_range = params.get('range', 'all')
+    if date_range != 'all':
+        if date_range not in RANGES:
+            raise ValueError(f"Unknown range {date_range!r}; expected one of {['all', *RANGES]}")
+        since = date.today() - timedelta(days=RANGES[date_range])
+    match = params.get('match', 'all')
+    if match not in ('all', 'any'):
+        raise ValueError(f"Unknown match {match!r}; expected 'all' or 'any'")
+    exclude = {public_id.strip() for public_id in params.get('exclude', '').split(',') if public_id.strip()}
+    return {
+        'n': max(0, min(int(params.get('n', 20)), 200)),
+        'tags': [tag for tag in params.get('tag', '').split(',') if tag.strip()],
+        'match': match,
+        'since': since,
+        'until': until,
+        'exclude': exclude,
+    }
+
+
+def watch_dataset(holder, root, tag_index_path, interval):
+    """
+    Rebuilds the index whenever the dataset files change, in a daemon thread.
+
+    Requests keep using the old index until the new one is built, then holder['index'] is
+    swapped in a single assignment.
+
+    Args:
+        holder (dict): Holds the live index under 'index'.
+        root (str): Dataset directory.
+        tag_index_path (str): Tag index file.
+        interval (float): Seconds between checks.
+    """
+    def poll():
+        last = signature(root)
+        while True:
+            time.sleep(interval)
+            current = signature(root)
+            if current == last:
+                continue
+            try:
+                holder['index'] = QuizIndex.from_dataset(root, tag_index_path)
+            except Exception as e:
+                # Keep serving the old index; a half-written month is picked up on the next check
+                print(f"Failed to reload {root}: {e}")
+                continue
+            last = current
+            print(f"Reloaded {len(holder['index'])} questions.")
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+    return thread
+
+
+def make_handler(holder):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            index = holder['index']
+            url = urlsplit(self.path)
+            if url.path == '/health':
+                return self._reply(200, {'status': 'ok', 'questions': len(index)})
+            if url.path == '/tags':
+                return self._reply(200, index.tag_index.counts())
+            if url.path != '/questions':
+                return self._reply(404, {'error': 'Not found'})
+            try:
+                params = parse_query(url.query)
+            except ValueError as e:
+                return self._reply(400, {'error': str(e)})
+            self._reply(200, index.sample(**params))
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve random quiz questions from the fact-check dataset.")
+    parser.add_argument('--dataset', default=DATASET_DIR, help="Parquet dataset written by scraper.py / llm_cat.py.")
+    parser.add_argument('--tag-index', default=TAG_INDEX_PATH, help="Tag index written by the ingest pipeline.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--reload-interval', type=float, default=0,
+                        help="Seconds between checks for new data in the dataset; 0 disables reloading.")
+    args = parser.parse_args()
+
+    print(f"Loading questions from {args.dataset}...")
+    holder = {'index': QuizIndex.from_dataset(args.dataset, args.tag_index)}
+    print(f"Indexed {len(holder['index'])} questions and {len(holder['index'].tag_index)} tags.")
+    if args.reload_interval > 0:
+        watch_dataset(holder, args.dataset, args.tag_index, args.reload_interval)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(holder))
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Snopes ratings per quiz category, as in the frontend's categorizeRating
+FAKE_RATINGS = frozenset(['Unfounded', 'Fake', 'Unproven', 'False', 'Originated as Satire', 'Mixture', 'Misattributed',
+                          'Miscaptioned', 'Legend', 'Mostly False', 'Outdated', 'Scam', 'Labeled Satire'])
+TRUE_RATINGS = frozenset(['True', 'Correct Attribution', 'Mostly True', 'Legit'])
+
+FAKE = 'Fake'
+REAL = 'Real'
+AMBIGUOUS = 'Ambiguous'
+# Enum values in code order: the Category column stores int8 codes into this list
+CATEGORIES = (FAKE, REAL, AMBIGUOUS)
+SERVED_CATEGORIES = (FAKE, REAL)
+CATEGORY_TYPE = pa.dictionary(pa.int8(), pa.string())
+# Column holding the URL of a fact check's near-duplicate cluster representative (see near_dupes.py)
+CANONICAL = 'Canonical_URL'
+
+_CATEGORY_BY_RATING = {**{rating: FAKE for rating in FAKE_RATINGS}, **{rating: REAL for rating in TRUE_RATINGS}}
+
+
+def categorize_rating(rating):
+    """
+    Maps a Snopes rating to 'Fake', 'Real' or 'Ambiguous'.
+    """
+    if not isinstance(rating, str):
+        return AMBIGUOUS
+    return _CATEGORY_BY_RATING.get(rating.strip(), AMBIGUOUS)
+
+
+def categorize_ratings(ratings):
+    """
+    Vectorized categorize_rating.
+
+    Args:
+        ratings (Series): Rating strings.
+
+    Returns:
+        Categorical: Categories with CATEGORIES as the category order.
+    """
+    categories = ratings.astype(object).str.strip().map(_CATEGORY_BY_RATING).fillna(AMBIGUOUS)
+    return pd.Categorical(categories, categories=list(CATEGORIES))
+
+
+def category_array(ratings):
+    """
+    Returns:
+        pyarrow.DictionaryArray: The compact Category column for these ratings.
+    """
+    codes = categorize_ratings(ratings).codes.astype('int8')
+    return pa.DictionaryArray.from_arrays(pa.array(codes, pa.int8()), pa.array(CATEGORIES, pa.string()))
+
+
+def served_filter():
+    """
+    Returns:
+        pyarrow.dataset.Expression: Dataset filter keeping the rows the quiz serves: no Ambiguous ratings
+            and no near-duplicates. Rows that were never deduplicated have a null Canonical_URL and are kept.
+    """
+    canonical = ds.field(CANONICAL)
+    return ds.field('Category').isin(list(SERVED_CATEGORIES)) & (canonical.is_null() | (canonical == ds.field('URL')))
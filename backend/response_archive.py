@@ -0,0 +1,254 @@
+"""
+Raw response archive.
+
+Every page the scrapers download is kept, so changed selectors can be re-run over the
+archive instead of re-crawling Snopes, and any page can be pulled out for debugging.
+
+Usage:
+    python response_archive.py                      # summary
+    python response_archive.py https://www.snopes.com/fact-check/... > page.html
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import zstandard
+
+ARCHIVE_DIR = 'response_archive'
+LISTING = 'listing'
+ARTICLE = 'article'
+
+# Worker processes decompress with their own context; zstd contexts are not thread-safe
+_decompressor = None
+
+
+def read_body(root, segment, offset, length):
+    """
+    Reads and decompresses one archived body straight from its segment file.
+
+    Args:
+        root (str): Archive directory.
+        segment (str): Segment file name.
+        offset (int): Byte offset of the compressed frame.
+        length (int): Compressed size.
+
+    Returns:
+        bytes: The response body.
+    """
+    global _decompressor
+    if _decompressor is None:
+        _decompressor = zstandard.ZstdDecompressor()
+    with open(os.path.join(root, segment), 'rb') as f:
+        f.seek(offset)
+        return _decompressor.decompress(f.read(length))
+
+
+def _apply(func, root, segment, offset, length, *args):
+    # Runs in a ParsePool worker: only the frame location crosses the process boundary
+    return func(read_body(root, segment, offset, length), *args)
+
+
+class ResponseArchive:
+    def __init__(self, root=ARCHIVE_DIR, level=3, segment_bytes=256 * 1024 * 1024):
+        """
+        Append-only, content-addressed store of raw HTTP responses.
+
+        Bodies are zstd-compressed one frame each and appended to segment files, like WARC
+        records. A body is stored once per SHA-256, so re-fetching an unchanged page only
+        adds an index row. The SQLite index maps every fetch (URL, time, status, headers)
+        to its body's segment and offset.
+
+        Writes must come from one thread; call commit() to make them visible to readers.
+
+        Args:
+            root (str): Archive directory.
+            level (int): zstd compression level.
+            segment_bytes (int): Size after which a new segment file is started.
+        """
+        self.root = root
+        self.segment_bytes = segment_bytes
+        os.makedirs(root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, 'index.sqlite'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                sha256 TEXT PRIMARY KEY,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                kind TEXT,
+                status INTEGER NOT NULL,
+                headers TEXT,
+                sha256 TEXT NOT NULL REFERENCES bodies (sha256)
+            );
+            CREATE INDEX IF NOT EXISTS responses_url ON responses (url, fetched_at);
+        """)
+        self.conn.commit()
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._segment = None
+        self._segment_name = None
+        self._uncommitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.commit()
+        if self._segment is not None:
+            self._segment.close()
+        self.conn.close()
+
+    def commit(self):
+        # Segment data must be on disk before the index points at it
+        if self._segment is not None:
+            self._segment.flush()
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def _open_segment(self):
+        if self._segment is not None and self._segment.tell() < self.segment_bytes:
+            return self._segment
+        if self._segment is not None:
+            self._segment.close()
+        existing = sorted(name for name in os.listdir(self.root) if name.endswith('.zst'))
+        if existing and os.path.getsize(os.path.join(self.root, existing[-1])) < self.segment_bytes:
+            self._segment_name = existing[-1]
+        else:
+            self._segment_name = f'segment-{len(existing):05d}.zst'
+        self._segment = open(os.path.join(self.root, self._segment_name), 'ab')
+        return self._segment
+
+    def put(self, url, body, status=200, headers=None, kind=None, fetched_at=None):
+        """
+        Records one fetch.
+
+        Args:
+            url (str): Requested URL.
+            body (bytes): Raw response body.
+            status (int): HTTP status.
+            headers (dict): Response headers.
+            kind (str): LISTING, ARTICLE or None; replay() selects by it.
+            fetched_at (float): Unix time; defaults to now.
+
+        Returns:
+            str: Hex SHA-256 of the body.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        if self.conn.execute("SELECT 1 FROM bodies WHERE sha256 = ?", (digest,)).fetchone() is None:
+            frame = self._compressor.compress(body)
+            segment = self._open_segment()
+            offset = segment.tell()
+            segment.write(frame)
+            self.conn.execute("INSERT INTO bodies VALUES (?, ?, ?, ?, ?)",
+                              (digest, self._segment_name, offset, len(frame), len(body)))
+        self.conn.execute(
+            "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (url, fetched_at or time.time(), kind, status, json.dumps(dict(headers or {})), digest),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= 100:
+            self.commit()
+        return digest
+
+    def latest(self, url):
+        """
+        Returns:
+            dict: The most recent fetch of url (url, fetched_at, kind, status, headers, body), or None.
+        """
+        row = self.conn.execute("""
+            SELECT r.url, r.fetched_at, r.kind, r.status, r.headers, b.segment, b.offset, b.length
+            FROM responses r JOIN bodies b USING (sha256)
+            WHERE r.url = ? ORDER BY r.fetched_at DESC LIMIT 1
+        """, (url,)).fetchone()
+        if row is None:
+            return None
+        url, fetched_at, kind, status, headers, segment, offset, length = row
+        return {'url': url, 'fetched_at': fetched_at, 'kind': kind, 'status': status,
+                'headers': json.loads(headers), 'body': read_body(self.root, segment, offset, length)}
+
+    def locations(self, kind=None, before=None):
+        """
+        Locates the latest successful fetch of every URL.
+
+        Args:
+            kind (str): Only URLs recorded with this kind.
+            before (float): Ignore fetches after this Unix time, to replay the archive as of a past crawl.
+
+        Returns:
+            list: (url, segment, offset, length) tuples in segment order, so replay reads sequentially.
+        """
+        rows = self.conn.execute("""
+            SELECT r.url, b.segment, b.offset, b.length, MAX(r.fetched_at)
+            FROM responses r JOIN bodies b USING (sha256)
+            WHERE r.status = 200 AND (?1 IS NULL OR r.kind = ?1) AND (?2 IS NULL OR r.fetched_at <= ?2)
+            GROUP BY r.url
+        """, (kind, before)).fetchall()
+        return sorted((row[:4] for row in rows), key=lambda row: (row[1], row[2]))
+
+    def replay(self, pool, func, kind=ARTICLE, before=None):
+        """
+        Runs an extractor over the archived bodies on the pool's worker processes, without network.
+
+        Workers read and decompress the bodies themselves, so only (segment, offset)
+        references are sent to them.
+
+        Args:
+            pool (ParsePool): Worker processes.
+            func (callable): Module-level func(body, url), e.g. extraction.extract_article.
+            kind (str): Which responses to replay.
+            before (float): See locations().
+
+        Yields:
+            tuple: (url, result, error) as from ParsePool.map().
+        """
+        items = ((url, (func, self.root, segment, offset, length, url))
+                 for url, segment, offset, length in self.locations(kind, before))
+        yield from pool.map(_apply, items)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Fetch, URL and body counts, raw and compressed bytes.
+        """
+        fetches, urls = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM responses").fetchone()
+        bodies, raw, compressed = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM bodies"
+        ).fetchone()
+        return {'fetches': fetches, 'urls': urls, 'bodies': bodies, 'raw_bytes': raw, 'compressed_bytes': compressed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the raw response archive.")
+    parser.add_argument('url', nargs='?', help="Write the latest archived body of this URL to stdout.")
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="Archive directory.")
+    args = parser.parse_args()
+
+    with ResponseArchive(args.archive) as archive:
+        if args.url is None:
+            stats = archive.stats()
+            ratio = stats['raw_bytes'] / stats['compressed_bytes'] if stats['compressed_bytes'] else 0
+            print(f"{stats['fetches']} fetches of {stats['urls']} URLs, {stats['bodies']} distinct bodies, "
+                  f"{stats['raw_bytes'] / 2**20:.1f} MiB raw, {stats['compressed_bytes'] / 2**20:.1f} MiB "
+                  f"compressed ({ratio:.1f}x)")
+            return
+        response = archive.latest(args.url)
+        if response is None:
+            sys.exit(f"{args.url} is not in {args.archive}")
+        sys.stdout.buffer.write(response['body'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+# Bump when the scoring code changes in a way that invalidates stored scores
+CACHE_VERSION = 1
+
+
+class ScoreCache:
+    def __init__(self, path='score_cache.sqlite', version=CACHE_VERSION):
+        """
+        Persistent, content-addressed cache of zero-shot scores.
+
+        Entries are keyed by a hash of model name, label set, hypothesis template and text,
+        so changing any of them is a cache miss. Entries written by another cache version
+        are ignored and removed by evict().
+
+        Args:
+            path (str): SQLite database path.
+            version (int): Cache format/scoring version.
+        """
+        self.path = path
+        self.version = version
+        # Sharded scoring workers share the database, so wait for locks instead of failing
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                key TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                scores TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    @staticmethod
+    def key(model_name, labels, hypothesis_template, text):
+        """
+        Returns:
+            str: Hex SHA-256 over the inputs that determine a score.
+        """
+        payload = json.dumps([model_name, list(labels), hypothesis_template, text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Looks up many keys at once and refreshes their last-used time.
+
+        Args:
+            keys (iterable): Cache keys.
+
+        Returns:
+            dict: key -> list of per-label scores, for the keys that were found.
+        """
+        keys = list(keys)
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, scores FROM scores WHERE version = ? AND key IN ({placeholders})", [self.version, *chunk]
+            )
+            found.update((key, json.loads(scores)) for key, scores in rows)
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?", ((now, key) for key in found))
+            self.conn.commit()
+        return found
+
+    def put_many(self, items):
+        """
+        Stores scores.
+
+        Args:
+            items (dict): key -> list of per-label scores.
+        """
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scores (key, version, scores, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+            ((key, self.version, json.dumps(scores), now, now) for key, scores in items.items()),
+        )
+        self.conn.commit()
+
+    def evict(self, max_entries=None, max_age_days=None):
+        """
+        Removes entries from other cache versions, entries unused for max_age_days,
+        and the least recently used entries beyond max_entries.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        removed = self.conn.execute("DELETE FROM scores WHERE version != ?", (self.version,)).rowcount
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            removed += self.conn.execute("DELETE FROM scores WHERE last_used < ?", (cutoff,)).rowcount
+        if max_entries is not None:
+            removed += self.conn.execute("""
+                DELETE FROM scores WHERE key IN (
+                    SELECT key FROM scores ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (max_entries,)).rowcount
+        self.conn.commit()
+        return removed
@@ -1,11 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import time
-from urllib.parse import urljoin
-import json
-from transformers import pipeline
-import torch
+import argparse
+from contextlib import nullcontext
+
+from crawl_state import CrawlState, record_hash
+from extraction import extract_article, parse_listing
+from fetcher import Fetcher
+from metrics import METRICS, add_arguments, instrumented
+from near_dupes import assign_canonical
+from parse_pool import ParsePool
+from response_archive import ARCHIVE_DIR, ARTICLE, LISTING, ResponseArchive
+from score_cache import ScoreCache
+from sinks import JsonLinesSink, iter_frames
+from storage import DATASET_DIR, export, map_partitions, upsert_dataset
+from tag_index import TAG_INDEX_PATH, TagIndex
+from zero_shot import BACKENDS, CANDIDATE_LABELS, get_engine
 
 # Constants
 BASE_URL = "https://www.snopes.com/fact-check/"
@@ -14,202 +21,339 @@ HEADERS = {
                   "AppleWebKit/537.36 (KHTML, like Gecko) " \
                   "Chrome/90.0.4430.93 Safari/537.36"
 }
+JSONL_PATH = 'snopes_fact_checks.jsonl'
+STATE_PATH = 'crawl_state.sqlite'
 
 class DifficultyCategorizer:
-    def __init__(self, model_name="facebook/bart-large-mnli", device=-1):
+    def __init__(self, model_name="facebook/bart-large-mnli", device=-1, cache=None, backend='torch'):
         """
-        Initializes the zero-shot classification pipeline.
+        Binds to the process-wide zero-shot engine; the model is loaded on first use.
 
         Args:
             model_name (str): Hugging Face model name for zero-shot classification.
             device (int): Device to run the model on (-1 for CPU, >=0 for GPU).
+            cache (ScoreCache): Optional persistent score cache shared with llm_cat.DifficultyScorer.
+            backend (str): Inference backend: 'torch', 'int8' or 'onnx' (see zero_shot.BACKENDS).
         """
-        self.classifier = pipeline("zero-shot-classification", model=model_name, device=device)
+        self.cache = cache
+        self.engine = get_engine(model_name, device=device, labels=CANDIDATE_LABELS, backend=backend)
 
-    def categorize(self, text, candidate_labels):
+    def categorize(self, texts, batch_size=32):
         """
-        Categorizes the input text into one of the candidate labels.
+        Categorizes texts into the candidate labels.
 
         Args:
-            text (str): The text to classify.
-            candidate_labels (list): List of labels to classify the text into.
+            texts (iterable): The texts to classify.
+            batch_size (int): Number of texts per forward batch.
 
         Returns:
-            str: The label with the highest confidence score.
+            tuple: (list of labels with the highest confidence, list of "Hard to Know" scores)
         """
-        result = self.classifier(text, candidate_labels)
-        return result['labels'][0]
-
-# Initialize DataFrame
-df = pd.DataFrame(columns=['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags', 'Claim', 'Context', 'ArticleContent'])
-
-total_pages = 300
-print(f"Total pages to scrape: {total_pages}")
-
-# Scrape all pages
-all_links = set()  # Use a set to automatically remove duplicates
-for page_num in range(1, total_pages + 1):
-    page_url = f"{BASE_URL}?pagenum={page_num}"
-    print(f"Scraping page {page_num}: {page_url}")
-    response = requests.get(page_url, headers=HEADERS)
-    
-    response.raise_for_status()
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    articles = soup.find_all('div', class_='article_wrapper')
-    for article in articles:
-        a_tag = article.find('a', class_='outer_article_link_wrapper')
-        if a_tag and a_tag.get('href'):
-            link = urljoin(BASE_URL, a_tag['href'])
-            all_links.add(link)
-    print(f"Found {len(articles)} articles on page {page_num}.")
-    
-    time.sleep(1)  # Respectful delay between page requests
-
-# Convert set back to list for further processing
-all_links = list(all_links)
-
-# Calculate and print the number of duplicate articles removed
-total_articles_found = sum(len(soup.find_all('div', class_='article_wrapper')) for _ in range(total_pages))
-duplicates_removed = total_articles_found - len(all_links)
-
-print(f"Number of duplicate articles removed: {duplicates_removed}")
-print(f"Total unique articles found: {len(all_links)}")
-
-# Process each article
-all_data = []
-for idx, url in enumerate(all_links, start=1):
-    print(f"Processing article {idx}/{len(all_links)}")
-    try:
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        data = {"Title": "N/A", "Author": "N/A", "Date": "N/A", "Summary": "N/A", "URL": url, "Image": "N/A", "PostDate": "N/A", "Rating": "N/A", "Tags": [], "Claim": "N/A", "Context": "N/A", "ArticleContent": "N/A"}
-        
-        # Extract JSON-LD structured data
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_ld_scripts:
-            try:
-                json_data = json.loads(script.string, strict=False)
-                if isinstance(json_data, list):
-                    json_data = json_data[0]
-                if json_data.get('@type') == 'Article':
-                    data['Title'] = json_data.get('headline', 'N/A')
-                    author_info = json_data.get('author', {})
-                    if isinstance(author_info, dict):
-                        data['Author'] = author_info.get('name', 'N/A')
-                    data['Date'] = json_data.get('datePublished', 'N/A')
-                    data['Summary'] = json_data.get('description', 'N/A')
-                    break
-            except (json.JSONDecodeError, TypeError):
+        return self.engine.classify(texts, batch_size=batch_size, cache=self.cache)
+
+
+COLUMNS = ['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags', 'Claim', 'Context', 'ArticleContent']
+
+
+def _downloaded(results, kind, on_error=None):
+    """
+    Filters fetch results down to successful responses, reporting failures.
+
+    Yields:
+        tuple: (url, response)
+    """
+    for url, response, error in results:
+        if error is not None:
+            print(f"Error fetching {kind} {url}: {error}")
+            if on_error:
+                on_error(url)
+            continue
+        yield url, response
+
+
+def _archived(downloads, archive, kind):
+    """
+    Records successful downloads in the response archive as they pass through.
+
+    Yields:
+        tuple: (url, response), unchanged.
+    """
+    for url, response in downloads:
+        if archive is not None and response.status_code == 200:
+            archive.put(url, response.content, response.status_code, response.headers, kind=kind)
+        yield url, response
+
+
+def collect_article_links(fetcher, pool, total_pages, base_url=BASE_URL, state=None, archive=None):
+    """
+    Fetches the listing pages concurrently and gathers the unique article links.
+
+    With a crawl state, listing pages are fetched one window of `fetcher.concurrency`
+    pages at a time, and pagination stops at the first page whose articles are all known.
+
+    Args:
+        fetcher (Fetcher): The fetch engine.
+        pool (ParsePool): Worker processes that parse the downloaded pages.
+        total_pages (int): Number of listing pages to fetch.
+        base_url (str): The fact-check listing URL.
+        state (CrawlState): Enables the stop-on-known-page cutoff.
+        archive (ResponseArchive): Records the raw listing pages.
+
+    Returns:
+        list: Unique article URLs, in listing order.
+    """
+    page_urls = [f"{base_url}?pagenum={page_num}" for page_num in range(1, total_pages + 1)]
+    window = fetcher.concurrency if state is not None else len(page_urls)
+    links_per_page = {}
+    for start in range(0, len(page_urls), window):
+        batch = page_urls[start:start + window]
+        downloads = ((page_url, (response.content, base_url))
+                     for page_url, response in _archived(_downloaded(fetcher.fetch_all(batch), "page"), archive, LISTING))
+        for page_url, page_links, error in pool.map(parse_listing, downloads):
+            if error is not None:
+                print(f"Error parsing page {page_url}: {error}")
                 continue
-        
-        # Fallback methods
-        if data['Title'] == "N/A":
-            title_tag = soup.find('title')
-            if title_tag:
-                data['Title'] = title_tag.text.replace('| Snopes.com', '').strip()
-        
-        if data['Summary'] == "N/A":
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc and meta_desc.get('content'):
-                data['Summary'] = meta_desc['content'].strip()
-        
-        if data['Author'] == "N/A":
-            author_section = soup.find('section', class_='author-container')
-            if author_section:
-                author_link = author_section.find('a', class_='author_link')
-                if author_link:
-                    data['Author'] = author_link.text.strip()
-        
-        if data['Summary'] == "N/A":
-            article_body = soup.find('article')
-            if article_body:
-                first_paragraph = article_body.find('p')
-                if first_paragraph:
-                    data['Summary'] = first_paragraph.text.strip()
-        
-        # Extract main image
-        main_image = soup.find('img', id='cover-main')
-        if main_image and main_image.get('src'):
-            data['Image'] = main_image['src']
-        
-        # Extract post date
-        post_date = soup.select_one('#article_main > section > section > div > section:nth-of-type(1) > div > div > div:nth-of-type(2) > h3')
-        if post_date:
-            data['PostDate'] = post_date.text.strip()
-        
-        # Extract rating
-        rating_element = soup.select_one('html body main section section div div:nth-of-type(2) div:nth-of-type(1) article section div:nth-of-type(2) a div:nth-of-type(2)')
-        if rating_element:
-            data['Rating'] = rating_element.text.strip()
-        
-        # Extract tags
-        tag_section = soup.find('div', id='tag_section')
-        if tag_section:
-            tag_buttons = tag_section.find_all('a', class_='tag_button')
-            data['Tags'] = [tag.text.strip() for tag in tag_buttons]
-        
-        # Extract claim
-        claim_wrapper = soup.find('div', class_='claim_wrapper')
-        if claim_wrapper:
-            claim_cont = claim_wrapper.find('div', class_='claim_cont')
-            if claim_cont:
-                data['Claim'] = claim_cont.text.strip()
-        
-        # Extract context
-        context_element = soup.find('div', class_='outer_fact_check_context')
-        if context_element:
-            context_parts = []
-            for info_wrapper in context_element.find_all('div', class_='fact_check_info_wrapper'):
-                title = info_wrapper.find('span', class_='fact_check_info_title')
-                description = info_wrapper.find('p', class_='fact_check_info_description')
-                if title and description:
-                    context_parts.append(f"{title.text.strip()}: {description.text.strip()}")
-            data['Context'] = ' '.join(context_parts)
-        
-        # Extract article content
-        article_content = soup.find('article', id='article-content')
-        if article_content:
-            data['ArticleContent'] = str(article_content)
-        
-        df = pd.concat([df, pd.DataFrame([data])], ignore_index=True)
-        all_data.append(data)
-        
-        # Append the data to JSON file after each successful extraction
-        with open('snopes_fact_checks.json', 'w', encoding='utf-8') as f:
-            json.dump(all_data, f, ensure_ascii=False, indent=4)
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching article {idx}: {e}")
-    
-    time.sleep(0.5)  # Respectful delay between requests
-
-# Save to CSV
-df.to_csv('snopes_fact_checks.csv', index=False)
-print("Data saved to snopes_fact_checks.csv")
-
-print("Data saved to snopes_fact_checks.json")
-
-# Initialize the DifficultyCategorizer
-categorizer = DifficultyCategorizer(model_name="facebook/bart-large-mnli", device=-1)
-
-# Define candidate labels
-candidate_labels = ["Easy", "Hard to Know"]
-
-# Apply categorization to the 'Summary' column
-print("Categorizing difficulty levels. This may take a while...")
-df['Difficulty'] = df['Summary'].apply(lambda x: categorizer.categorize(x, candidate_labels))
-
-# Display the first few rows to verify
-print(df[['Title', 'Summary', 'Difficulty']].head())
-
-# Save the updated DataFrame to a new CSV file
-df.to_csv('snopes_fact_checks_with_difficulty.csv', index=False)
-print("Categorization complete. Saved to 'snopes_fact_checks_with_difficulty.csv'.")
-
-# Save the updated data to JSON
-with open('snopes_fact_checks_with_difficulty.json', 'w', encoding='utf-8') as f:
-    json.dump(df.to_dict('records'), f, ensure_ascii=False, indent=4)
-print("Data saved to snopes_fact_checks_with_difficulty.json")
\ No newline at end of file
+            links_per_page[page_url] = page_links
+            print(f"Found {len(page_links)} articles on {page_url}.")
+
+        if state is None:
+            continue
+        cutoff = next((page_url for page_url in batch
+                       if links_per_page.get(page_url)
+                       and len(state.known(links_per_page[page_url])) == len(set(links_per_page[page_url]))), None)
+        if cutoff:
+            print(f"Every article on {cutoff} is already known. Stopping pagination.")
+            page_urls = page_urls[:page_urls.index(cutoff) + 1]
+            break
+
+    # Preserve listing order while removing duplicates
+    all_links = {}
+    total_articles_found = 0
+    for page_url in page_urls:
+        page_links = links_per_page.get(page_url, [])
+        total_articles_found += len(page_links)
+        for link in page_links:
+            all_links.setdefault(link, None)
+
+    print(f"Number of duplicate articles removed: {total_articles_found - len(all_links)}")
+    print(f"Total unique articles found: {len(all_links)}")
+    return list(all_links)
+
+
+def scrape_articles(fetcher, pool, links, sink, state=None, skip_unchanged=False, ordered=False, archive=None):
+    """
+    Fetches every article concurrently and parses them in worker processes.
+
+    Args:
+        fetcher (Fetcher): The fetch engine.
+        pool (ParsePool): Worker processes that parse the downloaded pages.
+        links (list): Article URLs to scrape.
+        sink (JsonLinesSink): Receives each record as soon as it is parsed.
+        state (CrawlState): Persistent crawl state, updated as articles are scraped.
+        skip_unchanged (bool): Fetch previously scraped URLs with conditional GETs and do not
+            write articles that come back 304 or whose extracted fields did not change.
+        ordered (bool): Write records in the order of `links` instead of as they finish (needs an ordered pool).
+        archive (ResponseArchive): Records the raw article pages.
+
+    Returns:
+        int: Number of records written in this run.
+    """
+    written = 0
+    unchanged = 0
+    headers_for = state.conditional_headers if skip_unchanged else None
+
+    def on_error(url):
+        if state is not None:
+            state.mark_failed(url, commit=False)
+
+    def downloads():
+        nonlocal unchanged
+        results = fetcher.fetch_all(links, ordered=ordered, headers_for=headers_for)
+        for url, response in _archived(_downloaded(results, "article", on_error), archive, ARTICLE):
+            if response.status_code == 304:
+                unchanged += 1
+                state.mark_done(url, commit=False)
+                continue
+            # Only the body and URL cross the process boundary; the validators stay in the key
+            yield (url, response.headers.get('ETag'), response.headers.get('Last-Modified')), (response.content, url)
+
+    for idx, ((url, etag, last_modified), data, error) in enumerate(pool.map(extract_article, downloads()), start=1):
+        print(f"Processing article {idx}/{len(links)}")
+        if error is not None:
+            print(f"Error parsing article {url}: {error}")
+            on_error(url)
+            METRICS.count('articles_total', result='failed')
+            continue
+
+        if state is not None:
+            digest = record_hash(data)
+            changed = digest != state.content_hash(url)
+            state.mark_done(url, etag, last_modified, digest, commit=False)
+            if skip_unchanged and not changed:
+                unchanged += 1
+                METRICS.count('articles_total', result='unchanged')
+                continue
+
+        sink.write(data)
+        written += 1
+        METRICS.count('articles_total', result='written')
+
+    if skip_unchanged:
+        print(f"Skipped {unchanged} unchanged articles.")
+    return written
+
+
+def replay_articles(archive, pool, sink, before=None):
+    """
+    Re-extracts every archived article with the current extractors, without network.
+
+    Args:
+        archive (ResponseArchive): The archive recorded by earlier crawls.
+        pool (ParsePool): Worker processes; decompression and parsing both run there.
+        sink (JsonLinesSink): Receives each record.
+        before (float): Replay the archive as it was at this Unix time.
+
+    Returns:
+        int: Number of records written.
+    """
+    written = 0
+    for idx, (url, data, error) in enumerate(archive.replay(pool, extract_article, ARTICLE, before), start=1):
+        if error is not None:
+            print(f"Error parsing archived article {url}: {error}")
+            continue
+        sink.write(data)
+        written += 1
+        if idx % 1000 == 0:
+            print(f"Replayed {idx} articles")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape Snopes fact checks.")
+    parser.add_argument('--base-url', default=BASE_URL, help="Fact-check listing URL.")
+    parser.add_argument('--pages', type=int, default=300, help="Number of listing pages to scrape.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Maximum requests in flight.")
+    parser.add_argument('--rate', type=float, default=2.0, help="Requests per second allowed per host.")
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="Processes used for HTML parsing (default: CPU count, 0 parses in-process).")
+    parser.add_argument('--ordered', action='store_true',
+                        help="Write articles in listing order instead of as soon as they are parsed.")
+    parser.add_argument('--backend', default='torch', choices=list(BACKENDS),
+                        help="Inference backend for difficulty scoring: torch, int8 or onnx.")
+    parser.add_argument('--no-score', action='store_true',
+                        help="Only crawl; skip difficulty scoring (torch and transformers are never imported).")
+    parser.add_argument('--state', default=STATE_PATH, help="SQLite crawl state (URL frontier and seen-set).")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Stop paginating at the first fully known listing page and skip known articles.")
+    parser.add_argument('--revalidate', action='store_true',
+                        help="With --incremental, re-check known articles with conditional GETs instead of skipping them.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Finish the pending frontier of an interrupted run without re-reading the listing pages.")
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="Raw response archive written during the crawl.")
+    parser.add_argument('--no-archive', action='store_true', help="Do not record raw responses.")
+    parser.add_argument('--replay', action='store_true',
+                        help="Re-extract the articles from the response archive instead of crawling.")
+    parser.add_argument('--dataset', default=DATASET_DIR, help="Parquet dataset (partitioned by publish month) to write.")
+    parser.add_argument('--tag-index', default=TAG_INDEX_PATH, help="Inverted tag index to write for the quiz API.")
+    parser.add_argument('--dedup-threshold', type=float, default=0.6,
+                        help="Claim similarity (estimated Jaccard) above which fact checks count as near-duplicates.")
+    parser.add_argument('--export', action='store_true',
+                        help="Also export the final dataset as snopes_fact_checks*.json/.csv.")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented(args):
+        run(args)
+
+
+def run(args):
+    """
+    Runs the crawl (or replay), dataset, dedup, tag index and scoring stages for the parsed arguments.
+    """
+
+    # Incremental and resumed runs add to the existing JSON Lines output instead of replacing it
+    append = (args.incremental or args.resume) and not args.replay
+
+    if args.replay:
+        with ResponseArchive(args.archive) as archive, ParsePool(workers=args.parse_workers) as pool, \
+                JsonLinesSink(JSONL_PATH, mode='w') as sink:
+            print(f"Replaying {archive.stats()['urls']} archived URLs from {args.archive} on {pool.workers} workers")
+            with METRICS.stage('replay') as stage:
+                stage.items = replay_articles(archive, pool, sink)
+    else:
+        with CrawlState(args.state) as state, \
+                (nullcontext() if args.no_archive else ResponseArchive(args.archive)) as archive, \
+                Fetcher(headers=HEADERS, concurrency=args.concurrency, rate_per_host=args.rate) as fetcher, \
+                ParsePool(workers=args.parse_workers, ordered=args.ordered) as pool, \
+                JsonLinesSink(JSONL_PATH, mode='a' if append else 'w', on_sync=state.commit) as sink:
+            if args.resume:
+                all_links = state.pending()
+                print(f"Resuming {len(all_links)} pending articles.")
+            else:
+                print(f"Total pages to scrape: {args.pages}")
+                with METRICS.stage('listing') as stage:
+                    all_links = collect_article_links(fetcher, pool, args.pages, args.base_url,
+                                                      state=state if args.incremental else None, archive=archive)
+                    stage.items = len(all_links)
+                if args.incremental and not args.revalidate:
+                    known = state.known(all_links)
+                    all_links = [link for link in all_links if link not in known]
+                elif not args.incremental:
+                    state.requeue(all_links)
+                state.add_pending(all_links)
+            with METRICS.stage('articles') as stage:
+                stage.items = scrape_articles(fetcher, pool, all_links, sink, state=state,
+                                              skip_unchanged=args.incremental, ordered=args.ordered, archive=archive)
+    print(f"Streamed {sink.count} records to {JSONL_PATH}")
+
+    # Merge the JSON Lines log into the typed Parquet dataset by URL, one chunk at a time; rows the
+    # Scrapy pipeline stored in the same dataset are kept, and so are the scores of unchanged articles
+    with METRICS.stage('dataset') as stage:
+        rows = stage.items = upsert_dataset(iter_frames(JSONL_PATH, COLUMNS, key='URL' if append else None),
+                                            args.dataset)
+    print(f"Merged {rows} records into the {args.dataset} dataset")
+
+    # Collapse re-checks of the same claim under different URLs onto one canonical question
+    with METRICS.stage('dedup') as stage:
+        compared, duplicates = assign_canonical(args.dataset, args.dedup_threshold)
+        stage.items = compared
+    print(f"Marked {duplicates} of {compared} fact checks as near-duplicates")
+
+    # Normalize the tags into the inverted index the quiz API serves tag queries from
+    tag_index = TagIndex.from_dataset(args.dataset)
+    tag_index.save(args.tag_index)
+    print(f"Indexed {len(tag_index)} tags in {args.tag_index}")
+
+    if args.no_score:
+        print("Skipping difficulty scoring (--no-score).")
+        if args.export:
+            export(args.dataset, json_path='snopes_fact_checks.json', csv_path='snopes_fact_checks.csv', columns=COLUMNS)
+            print("Data exported to snopes_fact_checks.json and snopes_fact_checks.csv")
+        return
+
+    # Initialize the DifficultyCategorizer; summaries scored in earlier runs come from the cache
+    cache = ScoreCache()
+    categorizer = DifficultyCategorizer(model_name="facebook/bart-large-mnli", device=-1, cache=cache,
+                                        backend=args.backend)
+
+    # Categorize the 'Summary' column month by month; the same pass yields the continuous score llm_cat.py reports
+    print("Categorizing difficulty levels. This may take a while...")
+
+    def categorize(frame):
+        frame['Difficulty'], frame['Difficulty_Score'] = categorizer.categorize(frame['Summary'])
+        stage.items += len(frame)
+        return frame
+
+    with METRICS.stage('scoring') as stage:
+        map_partitions(categorize, args.dataset)
+    cache.close()
+    print(f"Categorization complete. Saved to the {args.dataset} dataset.")
+
+    if args.export:
+        export(args.dataset, json_path='snopes_fact_checks_with_difficulty.json',
+               csv_path='snopes_fact_checks_with_difficulty.csv')
+        print("Data exported to snopes_fact_checks_with_difficulty.json and snopes_fact_checks_with_difficulty.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import csv
+import json
+import os
+import re
+import textwrap
+import time
+
+import pandas as pd
+
+_SEPARATOR = re.compile(r'[\s,]*')
+_WHITESPACE = re.compile(r'\s*')
+
+
+class JsonLinesSink:
+    def __init__(self, path, mode='a', fsync_every=100, fsync_interval=5.0, on_sync=None):
+        """
+        Append-only JSON Lines writer that flushes and fsyncs periodically.
+
+        Args:
+            path (str): Path of the .jsonl file.
+            mode (str): 'a' to append to an existing file, 'w' to start a new one.
+            fsync_every (int): Fsync after this many records.
+            fsync_interval (float): Fsync at least this often, in seconds, while records arrive.
+            on_sync (callable): Called after every fsync, once the records written so far are durable.
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.on_sync = on_sync
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, mode, encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record):
+        """
+        Appends one record as a single JSON line.
+
+        Args:
+            record (dict): The record to write.
+        """
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if self.on_sync:
+            self.on_sync()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+
+class ColumnarBuilder:
+    def __init__(self, columns):
+        """
+        Accumulates records as per-column lists so a DataFrame is built once at the end.
+
+        Appending is O(1) per record, unlike growing a DataFrame with pd.concat, which
+        copies the whole frame on every call.
+
+        Args:
+            columns (list): Column names, in output order.
+        """
+        self.columns = list(columns)
+        self._data = {column: [] for column in self.columns}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def write(self, record):
+        """
+        Appends one record; missing keys become None and unknown keys are ignored.
+
+        Args:
+            record (dict): The record to add.
+        """
+        for column, values in self._data.items():
+            values.append(record.get(column))
+        self.count += 1
+
+    def to_frame(self):
+        """
+        Returns:
+            DataFrame: All records written so far, with columns in the configured order.
+        """
+        return pd.DataFrame(self._data, columns=self.columns)
+
+
+def iter_jsonl(path):
+    """
+    Streams records from a JSON Lines file, skipping a truncated last line left by a crash.
+
+    Args:
+        path (str): Path of the .jsonl file.
+
+    Yields:
+        dict: One record per line.
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_unique(path, key):
+    """
+    Streams records from a JSON Lines file, keeping only the last record for each key.
+
+    Records appended by incremental runs supersede older ones. Only the keys and line
+    numbers are held in memory, never the records themselves.
+
+    Args:
+        path (str): Path of the .jsonl file.
+        key (str): Field identifying a record, e.g. 'URL'.
+
+    Yields:
+        dict: The latest record for each key, in order of last appearance.
+    """
+    last_seen = {}
+    for line_no, record in enumerate(iter_jsonl(path)):
+        last_seen[record.get(key)] = line_no
+    keep = set(last_seen.values())
+    del last_seen
+    for line_no, record in enumerate(iter_jsonl(path)):
+        if line_no in keep:
+            yield record
+
+
+def iter_json_array(path, read_size=1 << 20):
+    """
+    Streams the records of a JSON array file (as written by write_records) one at a time.
+
+    The file is decoded in read_size pieces with json.JSONDecoder.raw_decode, so memory
+    is bounded by the largest record rather than the file.
+
+    Args:
+        path (str): Path of the .json file.
+        read_size (int): Characters read at a time.
+
+    Yields:
+        One decoded value per array element; dicts for files written by write_records.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(read_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        eof = False
+        while True:
+            # Skip the whitespace and comma between elements
+            pos = _SEPARATOR.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                # A number cut by the read boundary decodes as a shorter one ('12' of '12345',
+                # '-7' of '-7.25'), so a value only counts once the ',' or ']' after it is read
+                complete = eof or buffer.startswith((',', ']'), _WHITESPACE.match(buffer, end).end())
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                more = f.read(read_size)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            pos = end
+            yield record
+
+
+def _record_frames(records, columns, chunk_size):
+    builder = None
+    for record in records:
+        if builder is None:
+            builder = ColumnarBuilder(columns or list(record))
+        builder.write(record)
+        if len(builder) >= chunk_size:
+            yield builder.to_frame()
+            builder = ColumnarBuilder(builder.columns)
+    if builder is not None and len(builder):
+        yield builder.to_frame()
+
+
+def iter_frames(path, columns=None, chunk_size=10000, key=None):
+    """
+    Reads a corpus in DataFrame chunks, loading only the requested columns.
+
+    Every format is streamed, so memory is bounded by chunk_size. Parquet column projection
+    skips unneeded columns on disk; for JSON Lines and JSON arrays records are parsed one
+    at a time and the other columns dropped right away.
+
+    Args:
+        path (str): A dataset directory, or a .parquet, .jsonl or .json file.
+        columns (list): Columns to keep; None keeps all of them.
+        chunk_size (int): Rows per chunk.
+        key (str): For JSON Lines, deduplicate on this field, keeping the last record.
+
+    Yields:
+        DataFrame: Consecutive chunks of rows.
+    """
+    if os.path.isdir(path):
+        from storage import iter_dataset
+
+        yield from iter_dataset(path, columns=columns, chunk_size=chunk_size)
+    elif path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    elif path.endswith('.jsonl'):
+        yield from _record_frames(iter_unique(path, key) if key else iter_jsonl(path), columns, chunk_size)
+    else:
+        yield from _record_frames(iter_json_array(path), columns, chunk_size)
+
+
+def write_records(records, json_path=None, csv_path=None, fields=None):
+    """
+    Streams records into a JSON array and/or CSV file.
+
+    The JSON output is byte-for-byte what json.dump(records, f, ensure_ascii=False, indent=4) would write.
+
+    Args:
+        records (iterable): Dicts to write.
+        json_path (str): Destination .json file, or None to skip.
+        csv_path (str): Destination .csv file, or None to skip.
+        fields (list): CSV column order; defaults to the keys of the first record.
+
+    Returns:
+        int: Number of records written.
+    """
+    json_file = open(json_path, 'w', encoding='utf-8') if json_path else None
+    csv_file = open(csv_path, 'w', encoding='utf-8', newline='') if csv_path else None
+    writer = None
+    count = 0
+    try:
+        for record in records:
+            if json_file:
+                json_file.write(',\n' if count else '[\n')
+                json_file.write(textwrap.indent(json.dumps(record, ensure_ascii=False, indent=4), '    '))
+            if csv_file:
+                if writer is None:
+                    writer = csv.DictWriter(csv_file, fieldnames=fields or list(record), extrasaction='ignore')
+                    writer.writeheader()
+                # Lists are written the way pandas.to_csv renders them, e.g. "['a', 'b']"
+                writer.writerow({k: str(v) if isinstance(v, list) else v for k, v in record.items()})
+            count += 1
+        if json_file:
+            json_file.write('\n]' if count else '[]')
+        if csv_file and writer is None and fields:
+            csv.DictWriter(csv_file, fieldnames=fields).writeheader()
+    finally:
+        if json_file:
+            json_file.close()
+        if csv_file:
+            csv_file.close()
+    return count
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Share the extraction code in backend/ with scraper.py
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
@@ -0,0 +1,65 @@
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from metrics import METRICS
+
+# Scrapy stats that are levels rather than running totals: the run's duration and rates,
+# memory usage and peaks. A name ending in '/' matches every stat under it.
+GAUGE_STATS = ('elapsed_time_seconds', 'items_per_minute', 'responses_per_minute', 'memusage/', 'memdebug/')
+
+
+class MetricsExtension:
+    """
+    Records per-response latency, status and size and item outcomes in the backend's metrics
+    registry, and writes it together with Scrapy's own stats when the spider closes.
+
+    Enabled when SNOPES_METRICS names the JSON summary; the Prometheus text goes next to it.
+    """
+
+    def __init__(self, stats, path):
+        self.stats = stats
+        self.path = path
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('SNOPES_METRICS')
+        if not path:
+            raise NotConfigured
+        ext = cls(crawler.stats, path)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def response_received(self, response, request, spider):
+        host = urlsplit(response.url).netloc
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            METRICS.observe('fetch_seconds', latency, host=host)
+        METRICS.count('http_responses_total', host=host, status=response.status)
+        METRICS.count('http_bytes_total', len(response.body), host=host)
+
+    def item_scraped(self, item, response, spider):
+        METRICS.count('items_total', result='scraped')
+
+    def item_dropped(self, item, response, exception, spider):
+        METRICS.count('items_total', result='dropped')
+
+    def spider_closed(self, spider):
+        # Scrapy's numeric stats (scheduler, retries, errors per type, ...) go out alongside ours;
+        # the start and finish times as Unix timestamps
+        for name, value in self.stats.get_stats().items():
+            if isinstance(value, datetime):
+                METRICS.gauge('scrapy_stat_timestamp_seconds', value.timestamp(), stat=name)
+            elif not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            elif name.startswith(GAUGE_STATS):
+                METRICS.gauge('scrapy_stat_value', value, stat=name)
+            else:
+                METRICS.count('scrapy_stat', value, stat=name)
+        METRICS.write(self.path)
+        spider.logger.info(f"Metrics written to {self.path}")
@@ -10,3 +10,8 @@ class SnopesFactCheckItem(scrapy.Item):
     PostDate = scrapy.Field()
     Rating = scrapy.Field()
     Tags = scrapy.Field()
+    Claim = scrapy.Field()
+    Context = scrapy.Field()
+    ArticleContent = scrapy.Field()
+    # Fake / Real / Ambiguous, derived from Rating (see ratings.categorize_rating)
+    Category = scrapy.Field()
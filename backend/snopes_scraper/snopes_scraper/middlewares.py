@@ -4,10 +4,13 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from response_archive import ResponseArchive
+
 
 class SnopesScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -101,3 +104,44 @@ class SnopesScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ResponseArchiveMiddleware:
+    """
+    Records every successful response in the raw response archive (see response_archive.py),
+    so `scraper.py --replay` can re-run the extractors without crawling again.
+
+    Enabled when SNOPES_ARCHIVE names the archive directory. Requests tag their page type
+    with meta['archive_kind'].
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.archive = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        root = crawler.settings.get('SNOPES_ARCHIVE')
+        if not root:
+            raise NotConfigured
+        s = cls(root)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_response(self, request, response):
+        if response.status == 200 and self.archive is not None:
+            headers = {
+                key.decode('latin-1'): b', '.join(values).decode('latin-1')
+                for key, values in response.headers.items()
+            }
+            self.archive.put(response.url, response.body, response.status, headers,
+                             kind=request.meta.get('archive_kind'))
+        return response
+
+    def spider_opened(self, spider):
+        self.archive = ResponseArchive(self.root)
+
+    def spider_closed(self, spider):
+        spider.logger.info(f"Archived {self.archive.stats()['fetches']} responses in {self.root}")
+        self.archive.close()
@@ -2,12 +2,188 @@
 #
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
+import os
+import re
+import time
 
-
-# useful for handling different item types with a single interface
+import pandas as pd
 from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem
+from twisted.internet import defer, task, threads
+from twisted.python.failure import Failure
+
+from metrics import METRICS
+from ratings import categorize_rating
+from score_cache import ScoreCache
+from storage import DATASET_DIR, append_dataset, read_dataset
+from tag_index import TAG_INDEX_PATH, TagIndex
+
+
+class DedupPipeline:
+    """
+    Drops items whose URL was already seen in this crawl or, with SNOPES_DEDUP_EXISTING,
+    is already in the dataset.
+    """
+
+    def __init__(self, dataset_dir, dedup_existing):
+        self.dataset_dir = dataset_dir
+        self.dedup_existing = dedup_existing
+        self.seen = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(settings.get('SNOPES_DATASET', DATASET_DIR), settings.getbool('SNOPES_DEDUP_EXISTING', True))
+
+    def open_spider(self, spider):
+        if self.dedup_existing and os.path.isdir(self.dataset_dir):
+            self.seen.update(read_dataset(self.dataset_dir, columns=['URL'])['URL'])
+            spider.logger.info(f"Dedup: {len(self.seen)} URLs already in {self.dataset_dir}")
+
+    def process_item(self, item, spider):
+        url = ItemAdapter(item).get('URL')
+        if url in self.seen:
+            raise DropItem(f"Duplicate URL: {url}")
+        self.seen.add(url)
+        return item
+
+
+class NormalizePipeline:
+    """
+    Cleans up ratings and tags and sets the item's quiz Category.
+    """
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        rating = adapter.get('Rating')
+        if isinstance(rating, str):
+            adapter['Rating'] = re.sub(r'\s+', ' ', rating).strip()
+        adapter['Category'] = categorize_rating(adapter.get('Rating'))
+
+        # Collapse whitespace and drop empty and case-insensitive duplicate tags, keeping the first spelling
+        tags, seen = [], set()
+        for tag in adapter.get('Tags') or []:
+            tag = re.sub(r'\s+', ' ', tag).strip()
+            if tag and tag.casefold() not in seen:
+                seen.add(tag.casefold())
+                tags.append(tag)
+        adapter['Tags'] = tags
+        return item
+
+
+class BatchStorePipeline:
+    """
+    Buffers items into micro-batches, scores their summaries and appends them to the dataset.
+
+    Batches are flushed when SNOPES_BATCH_SIZE items are buffered or SNOPES_FLUSH_INTERVAL
+    seconds have passed, so new fact checks reach the dataset and the tag index (and the quiz
+    API, which reloads both) within seconds. Scoring and writing run in a worker thread, one batch at a time, to
+    keep the reactor free; when more than SNOPES_MAX_PENDING_BATCHES are queued, item
+    processing waits for them so memory stays bounded.
+    """
+
+    def __init__(self, dataset_dir, tag_index_path, batch_size, flush_interval, max_pending, score, model,
+                 backend, cache_path):
+        self.dataset_dir = dataset_dir
+        self.tag_index_path = tag_index_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.score = score
+        self.model = model
+        self.backend = backend
+        self.cache_path = cache_path
+
+        self.buffer = []
+        self.pending = 0
+        self.written = 0
+        # Batches are chained so they are scored and written in order, never concurrently
+        self._chain = defer.succeed(None)
+        self._timer = None
+        self._engine = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            dataset_dir=settings.get('SNOPES_DATASET', DATASET_DIR),
+            tag_index_path=settings.get('SNOPES_TAG_INDEX', TAG_INDEX_PATH),
+            batch_size=settings.getint('SNOPES_BATCH_SIZE', 32),
+            flush_interval=settings.getfloat('SNOPES_FLUSH_INTERVAL', 5.0),
+            max_pending=settings.getint('SNOPES_MAX_PENDING_BATCHES', 4),
+            score=settings.getbool('SNOPES_SCORE', True),
+            model=settings.get('SNOPES_SCORE_MODEL', "facebook/bart-large-mnli"),
+            backend=settings.get('SNOPES_SCORE_BACKEND', 'torch'),
+            cache_path=settings.get('SNOPES_SCORE_CACHE', 'score_cache.sqlite'),
+        )
+
+    def open_spider(self, spider):
+        self.spider = spider
+        if self.score:
+            # Imported here so a crawl with SNOPES_SCORE = False never pays for torch
+            from zero_shot import CANDIDATE_LABELS, get_engine
 
+            self._engine = get_engine(self.model, labels=CANDIDATE_LABELS, backend=self.backend)
+        self._timer = task.LoopingCall(self._flush)
+        self._timer.start(self.flush_interval, now=False)
 
-class SnopesScraperPipeline:
     def process_item(self, item, spider):
+        self.buffer.append(ItemAdapter(item).asdict())
+        if len(self.buffer) < self.batch_size:
+            return item
+        flushed = self._flush()
+        if self.pending > self.max_pending:
+            # Backpressure: hold this item until the queued batches have caught up
+            return flushed.addCallback(lambda _: item)
         return item
+
+    def _flush(self):
+        """
+        Queues the buffered items as a batch.
+
+        Returns:
+            Deferred: Fires once every batch queued so far has been stored.
+        """
+        if self.buffer:
+            batch, self.buffer = self.buffer, []
+            self.pending += 1
+
+            def done(result):
+                self.pending -= 1
+                if isinstance(result, Failure):
+                    self.spider.logger.error(
+                        f"Failed to store a batch of {len(batch)} items: {result.getErrorMessage()}"
+                    )
+
+            self._chain.addCallback(lambda _: threads.deferToThread(self._process, batch)).addBoth(done)
+
+        finished = defer.Deferred()
+        self._chain.addCallback(lambda _: finished.callback(None))
+        return finished
+
+    def _process(self, batch):
+        # Runs in a reactor worker thread
+        start = time.monotonic()
+        frame = pd.DataFrame(batch)
+        if self._engine is not None:
+            # SQLite connections are bound to their thread, so the cache is opened per batch
+            with ScoreCache(self.cache_path) as cache:
+                frame['Difficulty'], frame['Difficulty_Score'] = self._engine.classify(
+                    frame['Summary'], batch_size=self.batch_size, cache=cache,
+                )
+        self.written += append_dataset(frame, self.dataset_dir)
+        # Refresh the tag index with every batch, so a quiz API reloading the dataset mid-crawl
+        # finds an index that covers the new rows instead of rebuilding one on each reload
+        TagIndex.from_dataset(self.dataset_dir).save(self.tag_index_path)
+        METRICS.observe('store_batch_seconds', time.monotonic() - start)
+        METRICS.count('items_stored_total', len(batch))
+        self.spider.logger.info(
+            f"Stored {len(batch)} items in {time.monotonic() - start:.2f}s ({self.written} this crawl)"
+        )
+
+    @defer.inlineCallbacks
+    def close_spider(self, spider):
+        if self._timer is not None and self._timer.running:
+            self._timer.stop()
+        yield self._flush()
+        spider.logger.info(f"Stored {self.written} items in {self.dataset_dir}")
@@ -50,21 +50,45 @@ ROBOTSTXT_OBEY = True
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "snopes_scraper.middlewares.SnopesScraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # Below HttpCompressionMiddleware (590), so the archive sees responses after gzip/br decoding
+    "snopes_scraper.middlewares.ResponseArchiveMiddleware": 580,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    "snopes_scraper.extensions.MetricsExtension": 500,
+}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "snopes_scraper.pipelines.SnopesScraperPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "snopes_scraper.pipelines.DedupPipeline": 100,
+    "snopes_scraper.pipelines.NormalizePipeline": 200,
+    "snopes_scraper.pipelines.BatchStorePipeline": 300,
+}
+
+# Batching store pipeline (see pipelines.BatchStorePipeline)
+SNOPES_DATASET = "snopes_dataset"
+SNOPES_TAG_INDEX = "snopes_tag_index.npz"
+SNOPES_DEDUP_EXISTING = True  # Skip articles already in the dataset
+SNOPES_BATCH_SIZE = 32
+SNOPES_FLUSH_INTERVAL = 5.0  # Seconds before a partial batch is flushed
+SNOPES_MAX_PENDING_BATCHES = 4
+SNOPES_SCORE = True
+SNOPES_SCORE_MODEL = "facebook/bart-large-mnli"
+SNOPES_SCORE_BACKEND = "torch"  # torch, int8 or onnx
+SNOPES_SCORE_CACHE = "score_cache.sqlite"
+
+# Listing pages fetched at once by SnopesSpider; article requests use the rest of CONCURRENT_REQUESTS
+SNOPES_LISTING_CONCURRENCY = 4
+
+# Raw response archive for offline re-extraction (scraper.py --replay); empty disables it
+SNOPES_ARCHIVE = "response_archive"
+
+# JSON metrics summary (plus a .prom file next to it) written when the spider closes; empty disables it
+SNOPES_METRICS = "metrics/scrapy.json"
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -1,9 +1,17 @@
+import os
+
 import scrapy
 from scrapy import Request
-from urllib.parse import urljoin
-import json
+from extraction import extract_article, parse_listing
+from metrics import METRICS
+from ratings import categorize_rating
+from response_archive import ARTICLE, LISTING
+from storage import DATASET_DIR, read_dataset
 from ..items import SnopesFactCheckItem
 
+# Highest page the exponential probe tries; far above the few hundred pages Snopes has
+MAX_PROBE_PAGE = 2 ** 14
+
 class SnopesSpider(scrapy.Spider):
     name = "snopes_fact_checks"
     allowed_domains = ["snopes.com"]
@@ -19,14 +27,14 @@ class SnopesSpider(scrapy.Spider):
                 'format': 'json',
                 'encoding': 'utf8',
                 'store_empty': False,
-                'fields': ['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags'],
+                'fields': ['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags', 'Category'],
                 'indent': 4,
             },
             'snopes_fact_checks.csv': {
                 'format': 'csv',
                 'encoding': 'utf8',
                 'store_empty': False,
-                'fields': ['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags'],
+                'fields': ['Title', 'Author', 'Date', 'Summary', 'URL', 'Image', 'PostDate', 'Rating', 'Tags', 'Category'],
             },
         },
         'LOG_LEVEL': 'INFO',  # To minimize log output, adjust as needed
@@ -36,104 +44,140 @@ class SnopesSpider(scrapy.Spider):
         'ROBOTSTXT_OBEY': True,  # Respect robots.txt
     }
 
-    def parse(self, response):
-        # Extract article links from the current page
-        articles = response.css('div.article_wrapper')
-        self.logger.info(f"Found {len(articles)} articles on {response.url}")
-
-        for article in articles:
-            relative_url = article.css('a.outer_article_link_wrapper::attr(href)').get()
-            if relative_url:
-                article_url = urljoin(response.url, relative_url)
-                yield Request(url=article_url, callback=self.parse_article)
-
-        # Handle pagination by following the "Next" button
-        next_page_relative = response.css('a.page-number.next::attr(href)').get()
-        if next_page_relative:
-            next_page_url = urljoin(response.url, next_page_relative)
-            self.logger.info(f"Following next page: {next_page_url}")
-            yield Request(url=next_page_url, callback=self.parse)
-        else:
-            self.logger.info("No more pages to scrape. Spider is terminating.")
-
-    def parse_article(self, response):
-        item = SnopesFactCheckItem()
-        item['URL'] = response.url
-
-        # Initialize default values
-        item['Title'] = "N/A"
-        item['Author'] = "N/A"
-        item['Date'] = "N/A"
-        item['Summary'] = "N/A"
-        item['Image'] = "N/A"
-        item['PostDate'] = "N/A"
-        item['Rating'] = "N/A"
-        item['Tags'] = []
-
-        # Extract JSON-LD structured data
-        json_ld_scripts = response.xpath('//script[@type="application/ld+json"]/text()').getall()
-        for script in json_ld_scripts:
-            try:
-                json_data = json.loads(script)
-                if isinstance(json_data, list):
-                    json_data = json_data[0]
-                if json_data.get('@type') == 'Article':
-                    item['Title'] = json_data.get('headline', 'N/A')
-                    author_info = json_data.get('author', {})
-                    if isinstance(author_info, dict):
-                        item['Author'] = author_info.get('name', 'N/A')
-                    item['Date'] = json_data.get('datePublished', 'N/A')
-                    item['Summary'] = json_data.get('description', 'N/A')
-                    break
-            except json.JSONDecodeError:
+    def __init__(self, pages=None, incremental=False, *args, **kwargs):
+        """
+        Crawls the fact-check listing pages concurrently instead of following "Next" links.
+
+        The number of listing pages is probed with `?pagenum=` requests: powers of two in
+        parallel, then a binary search between the last page that has articles and the
+        first that has none. Listing pages are then fetched SNOPES_LISTING_CONCURRENCY at a
+        time. Requests are prioritized by page, so the articles of early pages are fetched
+        while later listing pages are still being read.
+
+        Args:
+            pages (int): Number of listing pages; skips the probe (`-a pages=300`).
+            incremental (bool): Stop at the first listing page whose articles are all in the
+                dataset, and skip known articles (`-a incremental=true`).
+        """
+        super().__init__(*args, **kwargs)
+        self.last_page = int(pages) if pages else None
+        self.incremental = str(incremental).lower() in ('1', 'true', 'yes')
+        self.known_urls = set()
+        # Listing pages after the cutoff are not read: either past the end or already crawled
+        self.cutoff = self.last_page or MAX_PROBE_PAGE
+        self.probed = {}
+        self.pending_probes = 0
+        self.next_page = 1
+        self.listing_in_flight = 0
+
+    async def start(self):
+        # Scrapy 2.13+ entry point; older versions call start_requests() directly
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        self.listing_concurrency = self.settings.getint('SNOPES_LISTING_CONCURRENCY', 4)
+        if self.incremental:
+            dataset_dir = self.settings.get('SNOPES_DATASET', DATASET_DIR)
+            if os.path.isdir(dataset_dir):
+                self.known_urls = set(read_dataset(dataset_dir, columns=['URL'])['URL'])
+            self.logger.info(f"Incremental crawl: {len(self.known_urls)} articles already known")
+
+        if self.last_page is not None or self.incremental:
+            # The cutoff usually hits within the first pages, so an incremental crawl doesn't probe;
+            # without a known last page it stops at the first page without articles
+            yield from self._listing_requests()
+            return
+
+        page = 1
+        while page <= MAX_PROBE_PAGE:
+            yield self._probe_request(page)
+            page *= 2
+
+    def _page_url(self, page):
+        return f"{self.start_urls[0]}?pagenum={page}"
+
+    def _probe_request(self, page):
+        self.pending_probes += 1
+        # Probes run ahead of everything else: listing pages wait for the page count
+        return Request(self._page_url(page), callback=self.parse_probe, errback=self.probe_failed,
+                       cb_kwargs={'page': page}, priority=100, dont_filter=True,
+                       meta={'handle_httpstatus_list': [404], 'archive_kind': LISTING})
+
+    def parse_probe(self, response, page):
+        self.pending_probes -= 1
+        article_urls = parse_listing(response.body, response.url) if response.status == 200 else []
+        self.probed[page] = bool(article_urls)
+        # A probed page that exists is a regular listing page; its articles aren't fetched twice
+        yield from self._article_requests(page, article_urls)
+        yield from self._next_probe()
+
+    def probe_failed(self, failure):
+        page = failure.request.cb_kwargs['page']
+        self.logger.warning(f"Probe of listing page {page} failed: {failure.getErrorMessage()}")
+        self.pending_probes -= 1
+        self.probed[page] = False
+        yield from self._next_probe()
+
+    def _next_probe(self):
+        if self.pending_probes:
+            return
+        # Binary search between the last page known to exist and the first known to be missing
+        low = max((page for page, exists in self.probed.items() if exists), default=0)
+        high = min((page for page, exists in self.probed.items() if not exists and page > low),
+                   default=low + 1)
+        if high - low > 1:
+            yield self._probe_request((low + high) // 2)
+            return
+        self.last_page = self.cutoff = low
+        self.logger.info(f"Found {low} listing pages with {len(self.probed)} probes")
+        yield from self._listing_requests()
+
+    def _listing_requests(self):
+        # Keep a window of listing pages in flight; each finished page schedules the next
+        while self.listing_in_flight < self.listing_concurrency and self.next_page <= self.cutoff:
+            page = self.next_page
+            self.next_page += 1
+            if page in self.probed:
                 continue
+            self.listing_in_flight += 1
+            # A listing page shares its priority with the previous page's articles, so pagination
+            # stays one page ahead of the article downloads it feeds. A 404 past the last page
+            # reaches parse() like an empty page, so it sets the cutoff.
+            yield Request(self._page_url(page), callback=self.parse, errback=self.listing_failed,
+                          cb_kwargs={'page': page}, priority=1 - page,
+                          meta={'handle_httpstatus_list': [404], 'archive_kind': LISTING})
+
+    def parse(self, response, page=1):
+        self.listing_in_flight -= 1
+        article_urls = parse_listing(response.body, response.url) if response.status == 200 else []
+        self.logger.info(f"Found {len(article_urls)} articles on {response.url}")
+
+        if not article_urls and self.last_page is None:
+            self.cutoff = min(self.cutoff, page - 1)
+            self.logger.info(f"Listing page {page} {'is missing' if response.status == 404 else 'is empty'}; "
+                             f"no more pages to scrape")
+        elif self.incremental and article_urls and self.known_urls.issuperset(article_urls) and page < self.cutoff:
+            self.cutoff = page
+            self.logger.info(f"Every article on listing page {page} is known; stopping pagination here")
+        yield from self._article_requests(page, article_urls)
+        yield from self._listing_requests()
+
+    def listing_failed(self, failure):
+        self.logger.error(f"Failed to fetch {failure.request.url}: {failure.getErrorMessage()}")
+        self.listing_in_flight -= 1
+        yield from self._listing_requests()
+
+    def _article_requests(self, page, article_urls):
+        if page > self.cutoff:
+            # Was already in flight when an earlier page hit the cutoff
+            return
+        for article_url in article_urls:
+            if article_url not in self.known_urls:
+                yield Request(url=article_url, callback=self.parse_article, priority=-page,
+                              meta={'archive_kind': ARTICLE})
 
-        # Fallback methods
-        if item['Title'] == "N/A":
-            title = response.css('title::text').get()
-            if title:
-                item['Title'] = title.replace('| Snopes.com', '').strip()
-
-        if item['Summary'] == "N/A":
-            meta_desc = response.css('meta[name="description"]::attr(content)').get()
-            if meta_desc:
-                item['Summary'] = meta_desc.strip()
-
-        if item['Author'] == "N/A":
-            author_section = response.css('section.author-container')
-            if author_section:
-                author = author_section.css('a.author_link::text').get()
-                if author:
-                    item['Author'] = author.strip()
-
-        if item['Summary'] == "N/A":
-            first_paragraph = response.css('article p::text').get()
-            if first_paragraph:
-                item['Summary'] = first_paragraph.strip()
-
-        # Extract main image
-        main_image = response.css('img#cover-main::attr(src)').get()
-        if main_image:
-            item['Image'] = main_image
-
-        # Extract post date
-        post_date = response.css(
-            '#article_main > section > section > div > section:nth-of-type(1) > div > div > div:nth-of-type(2) > h3::text'
-        ).get()
-        if post_date:
-            item['PostDate'] = post_date.strip()
-
-        # Extract rating
-        rating_element = response.css(
-            'html body main section section div div:nth-of-type(2) div:nth-of-type(1) article section div:nth-of-type(2) a div:nth-of-type(2)::text'
-        ).get()
-        if rating_element:
-            item['Rating'] = rating_element.strip()
-
-        # Extract tags
-        tag_section = response.css('div#tag_section')
-        if tag_section:
-            tags = tag_section.css('a.tag_button::text').getall()
-            item['Tags'] = [tag.strip() for tag in tags]
-
-        yield item
+    def parse_article(self, response):
+        with METRICS.timer('parse_seconds', func='extract_article'):
+            data = extract_article(response.body, response.url)
+        yield SnopesFactCheckItem(**data, Category=categorize_rating(data['Rating']))
@@ -0,0 +1,3 @@
+# The project package puts backend/ on sys.path, as it does for a crawl, so the tests can
+# import the shared modules (metrics, response_archive, ...)
+import snopes_scraper  # noqa: F401
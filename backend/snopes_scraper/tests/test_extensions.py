@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+from scrapy.utils.test import get_crawler
+
+from metrics import METRICS
+from snopes_scraper.extensions import MetricsExtension
+from snopes_scraper.spiders.snopes_spider import SnopesSpider
+
+
+class Stats:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def get_stats(self):
+        return self.stats
+
+
+def test_scrapy_stats_are_typed_and_escaped(tmp_path):
+    METRICS.reset()
+    path = tmp_path / 'scraper.json'
+    extension = MetricsExtension(Stats({
+        'downloader/request_count': 12,
+        'elapsed_time_seconds': 3.5,
+        'memusage/max': 104857600,
+        'start_time': datetime(2024, 1, 1, tzinfo=timezone.utc),
+        'finish_reason': 'finished',
+        'spider_exceptions/Weird"Error\\\n': 1,
+    }), str(path))
+    extension.spider_closed(SnopesSpider.from_crawler(get_crawler(SnopesSpider)))
+
+    lines = (tmp_path / 'scraper.prom').read_text(encoding='utf-8').splitlines()
+    assert '# TYPE snopes_scrapy_stat counter' in lines
+    assert 'snopes_scrapy_stat{stat="downloader/request_count"} 12' in lines
+    assert '# TYPE snopes_scrapy_stat_value gauge' in lines
+    assert 'snopes_scrapy_stat_value{stat="elapsed_time_seconds"} 3.5' in lines
+    assert 'snopes_scrapy_stat_value{stat="memusage/max"} 104857600' in lines
+    assert 'snopes_scrapy_stat_timestamp_seconds{stat="start_time"} 1704067200.0' in lines
+    assert 'snopes_scrapy_stat{stat="spider_exceptions/Weird\\"Error\\\\\\n"} 1' in lines
+    assert not any('finish_reason' in line for line in lines)
+    METRICS.reset()
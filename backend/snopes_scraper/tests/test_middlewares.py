@@ -0,0 +1,45 @@
+import gzip
+
+from scrapy import Request
+from scrapy.downloadermiddlewares.httpcompression import HttpCompressionMiddleware
+from scrapy.http import HtmlResponse
+from scrapy.settings.default_settings import DOWNLOADER_MIDDLEWARES_BASE
+from scrapy.utils.test import get_crawler
+
+from response_archive import ARTICLE, ResponseArchive
+from snopes_scraper import settings
+from snopes_scraper.middlewares import ResponseArchiveMiddleware
+from snopes_scraper.spiders.snopes_spider import SnopesSpider
+
+PAGE = b'<html><body><article><p>Claim checked.</p></article></body></html>'
+
+
+def test_archive_runs_after_decompression():
+    archive = settings.DOWNLOADER_MIDDLEWARES['snopes_scraper.middlewares.ResponseArchiveMiddleware']
+    decompression = DOWNLOADER_MIDDLEWARES_BASE['scrapy.downloadermiddlewares.httpcompression.HttpCompressionMiddleware']
+    # process_response runs from the highest priority down
+    assert archive < decompression
+
+
+def test_gzip_response_is_archived_decoded(tmp_path):
+    root = str(tmp_path / 'archive')
+    crawler = get_crawler(SnopesSpider, {'SNOPES_ARCHIVE': root})
+    spider = SnopesSpider.from_crawler(crawler)
+    decompression = HttpCompressionMiddleware.from_crawler(crawler)
+    middleware = ResponseArchiveMiddleware.from_crawler(crawler)
+
+    url = 'https://www.snopes.com/fact-check/example/'
+    request = Request(url, meta={'archive_kind': ARTICLE})
+    response = HtmlResponse(url, body=gzip.compress(PAGE), request=request,
+                            headers={'Content-Type': 'text/html', 'Content-Encoding': 'gzip'})
+    middleware.spider_opened(spider)
+    # In the order the downloader applies them, as checked above
+    response = middleware.process_response(request, decompression.process_response(request, response))
+    middleware.spider_closed(spider)
+
+    assert response.body == PAGE
+    with ResponseArchive(root) as archive:
+        fetch = archive.latest(url)
+    assert fetch['body'] == PAGE
+    assert fetch['kind'] == ARTICLE
+    assert 'Content-Encoding' not in fetch['headers']
@@ -0,0 +1,29 @@
+from scrapy.utils.test import get_crawler
+
+from snopes_scraper.pipelines import BatchStorePipeline
+from snopes_scraper.spiders.snopes_spider import SnopesSpider
+from tag_index import TagIndex
+
+
+def item(url, tags):
+    return {'Title': url, 'URL': url, 'Date': '2024-01-15', 'Summary': 'A claim.', 'Rating': 'False',
+            'Tags': tags, 'Category': 'Fake'}
+
+
+def test_every_stored_batch_refreshes_the_tag_index(tmp_path):
+    crawler = get_crawler(SnopesSpider, {
+        'SNOPES_DATASET': str(tmp_path / 'dataset'),
+        'SNOPES_TAG_INDEX': str(tmp_path / 'tags.npz'),
+        'SNOPES_SCORE': False,
+    })
+    pipeline = BatchStorePipeline.from_crawler(crawler)
+    pipeline.spider = SnopesSpider.from_crawler(crawler)
+
+    # The batch step that runs in the worker thread
+    pipeline._process([item('https://www.snopes.com/a', ['Politics'])])
+    assert TagIndex.load(str(tmp_path / 'tags.npz')).urls == ['https://www.snopes.com/a']
+
+    pipeline._process([item('https://www.snopes.com/b', ['politics', 'COVID-19'])])
+    index = TagIndex.load(str(tmp_path / 'tags.npz'))
+    assert index.urls == ['https://www.snopes.com/a', 'https://www.snopes.com/b']
+    assert index.counts() == {'covid-19': 1, 'politics': 2}
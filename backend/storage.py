@@ -0,0 +1,325 @@
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+from ratings import CATEGORY_TYPE, category_array
+from sinks import write_records
+
+DATASET_DIR = 'snopes_dataset'
+PARTITION = 'Month'
+UNKNOWN_MONTH = 'unknown'
+
+# Column types of the fact-check corpus. Tags stay a real list instead of a stringified one,
+# and columns added by later stages (scores) are part of the schema from the start.
+SCHEMA = pa.schema([
+    ('Title', pa.string()),
+    ('Author', pa.string()),
+    ('Date', pa.string()),
+    ('Summary', pa.string()),
+    ('URL', pa.string()),
+    ('Image', pa.string()),
+    ('PostDate', pa.string()),
+    ('Rating', pa.string()),
+    ('Tags', pa.list_(pa.string())),
+    ('Claim', pa.string()),
+    ('Context', pa.string()),
+    ('ArticleContent', pa.string()),
+    ('Difficulty', pa.string()),
+    ('Difficulty_Score', pa.float64()),
+    # URL of the row's near-duplicate cluster representative, set by near_dupes.py
+    ('Canonical_URL', pa.string()),
+    # Quiz category derived from Rating at write time: int8 codes into ratings.CATEGORIES
+    ('Category', CATEGORY_TYPE),
+])
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION, pa.string())]), flavor='hive')
+
+# Memory-map Parquet files instead of copying them into process memory
+_filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+
+def publish_month(dates):
+    """
+    Maps publish dates to their 'YYYY-MM' partition.
+
+    Args:
+        dates (Series): Date strings, ISO 8601 (JSON-LD) or as shown on the page.
+
+    Returns:
+        Series: Month strings; UNKNOWN_MONTH where the date could not be parsed.
+    """
+    parsed = pd.to_datetime(dates.where(dates != 'N/A'), errors='coerce', utc=True, format='mixed')
+    return parsed.dt.strftime('%Y-%m').fillna(UNKNOWN_MONTH)
+
+
+def to_table(frame):
+    """
+    Converts a DataFrame to an Arrow table with the corpus schema plus the partition column.
+
+    Missing schema columns are added as nulls; columns outside the schema are dropped.
+    Category is always recomputed from Rating.
+    """
+    stored = SCHEMA.remove(SCHEMA.get_field_index('Category'))
+    frame = frame.reindex(columns=stored.names)
+    # Pandas uses NaN for missing strings in object columns; Arrow needs None
+    strings = [field.name for field in stored if pa.types.is_string(field.type)]
+    frame[strings] = frame[strings].astype(object).where(frame[strings].notna(), None)
+    table = pa.Table.from_pandas(frame, schema=stored, preserve_index=False)
+    table = table.append_column(SCHEMA.field('Category'), category_array(frame['Rating']))
+    return table.append_column(PARTITION, pa.array(publish_month(frame['Date']), pa.string()))
+
+
+def _replace_dir(tmp_dir, path):
+    # Swap a finished directory into place so readers never see a half-written dataset. The old
+    # copy gets a dot-prefixed name, which dataset discovery and partitions() both skip.
+    old_dir = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.old')
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_dir)
+    os.replace(tmp_dir, path)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def append_dataset(frame, root=DATASET_DIR):
+    """
+    Adds rows to the dataset as new files in their month partitions, leaving existing files alone.
+
+    The files are written to a scratch directory first and moved into place one by one, so
+    readers see either none or all of a file. map_partitions() later folds them into one file
+    per month.
+
+    Args:
+        frame (DataFrame): Rows to add.
+        root (str): Dataset directory.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if not len(frame):
+        return 0
+    batch_id = uuid.uuid4().hex
+    tmp_dir = f'{root}.append-{batch_id}'
+    ds.write_dataset(
+        to_table(frame), tmp_dir, format='parquet', partitioning=PARTITIONING,
+        basename_template=f'part-{batch_id}-{{i}}.parquet',
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+    )
+    for partition in os.listdir(tmp_dir):
+        os.makedirs(os.path.join(root, partition), exist_ok=True)
+        for name in os.listdir(os.path.join(tmp_dir, partition)):
+            os.replace(os.path.join(tmp_dir, partition, name), os.path.join(root, partition, name))
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return len(frame)
+
+
+def upsert_dataset(frames, root=DATASET_DIR, key='URL', keep=('Difficulty', 'Difficulty_Score')):
+    """
+    Merges rows into the dataset by key, leaving the rows of other keys alone.
+
+    Rows with a new key are added with append_dataset(). A row whose key is already stored
+    replaces the old row; the month partitions holding the old row or receiving the new one
+    are rewritten one at a time. Rows written by other ingest paths (the Scrapy pipeline)
+    survive, and a replacement with an unchanged Summary keeps the stored `keep` columns,
+    so re-crawled articles don't lose their scores.
+
+    Args:
+        frames (iterable): DataFrame chunks (or a single DataFrame).
+        root (str): Dataset directory.
+        key (str): Column identifying a row.
+        keep (tuple): Derived columns carried over from the stored row when Summary is unchanged.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    stored = dataset(root).to_table(columns=[key, PARTITION]) if partitions(root) else None
+    months = dict(zip(stored.column(key).to_pylist(), stored.column(PARTITION).to_pylist())) if stored else {}
+    count = 0
+    for frame in frames:
+        frame = frame.drop_duplicates(key, keep='last')
+        known = frame[key].isin(months.keys())
+        count += append_dataset(frame[~known], root)
+        months.update(zip(frame.loc[~known, key], publish_month(frame.loc[~known, 'Date'])))
+        if known.any():
+            count += _replace_rows(frame[known], root, key, keep, months)
+    return count
+
+
+def _replace_rows(frame, root, key, keep, months):
+    keys = list(frame[key])
+    previous = read_dataset(root, columns=[key, 'Summary', *keep], filter=ds.field(key).isin(keys))
+    previous = previous.drop_duplicates(key, keep='last').set_index(key)
+    frame = frame.reindex(columns=frame.columns.union(keep, sort=False))
+    unchanged = frame['Summary'].to_numpy() == previous['Summary'].reindex(frame[key]).to_numpy()
+    for column in keep:
+        carried = previous[column].reindex(frame[key]).to_numpy()
+        frame[column] = frame[column].where(~unchanged | frame[column].notna(), carried)
+
+    table = to_table(frame)
+    new_months = table.column(PARTITION).to_pylist()
+    affected = {months[k] for k in keys} | set(new_months)
+    for month in sorted(affected):
+        directory = os.path.join(root, f'{PARTITION}={month}')
+        kept = (dataset(root).to_table(filter=(ds.field(PARTITION) == month) & ~ds.field(key).isin(keys))
+                if os.path.isdir(directory) else table.slice(0, 0))
+        added = table.filter(pc.equal(table.column(PARTITION), month))
+        if kept.num_rows + added.num_rows:
+            _write_partition(pa.concat_tables([kept, added]).drop_columns([PARTITION]), root, directory)
+        else:
+            # Every row of the month moved to another one
+            shutil.rmtree(directory)
+    months.update(zip(keys, new_months))
+    return len(frame)
+
+
+def signature(root=DATASET_DIR):
+    """
+    Returns:
+        tuple: (month, file name, size, mtime) of every data file; changes whenever the dataset is written.
+    """
+    files = []
+    for month, directory in partitions(root):
+        for name in sorted(os.listdir(directory)):
+            stat = os.stat(os.path.join(directory, name))
+            files.append((month, name, stat.st_size, stat.st_mtime_ns))
+    return tuple(files)
+
+
+def dataset(root=DATASET_DIR):
+    """
+    Returns:
+        pyarrow.dataset.Dataset: The memory-mapped, hive-partitioned dataset at root.
+    """
+    return ds.dataset(root, schema=SCHEMA.append(pa.field(PARTITION, pa.string())), format='parquet',
+                      partitioning=PARTITIONING, filesystem=_filesystem)
+
+
+def read_dataset(root=DATASET_DIR, columns=None, months=None, filter=None):
+    """
+    Reads the dataset into a DataFrame, loading only the requested columns and months.
+
+    Args:
+        root (str): Dataset directory.
+        columns (list): Columns to load; None loads all of them.
+        months (list): 'YYYY-MM' partitions to load; None loads all of them.
+        filter (pyarrow.dataset.Expression): Row filter pushed down to the scan, e.g. ratings.served_filter().
+
+    Returns:
+        DataFrame: The rows, with Tags as lists.
+    """
+    if months is not None:
+        month_filter = ds.field(PARTITION).isin(months)
+        filter = month_filter if filter is None else filter & month_filter
+    return _to_frame(dataset(root).to_table(columns=columns, filter=filter))
+
+
+def iter_dataset(root=DATASET_DIR, columns=None, chunk_size=10000):
+    """
+    Streams the dataset as DataFrame chunks, partition by partition in month order.
+
+    Yields:
+        DataFrame: Consecutive chunks of at most chunk_size rows.
+    """
+    for batch in dataset(root).to_batches(columns=columns, batch_size=chunk_size):
+        if batch.num_rows:
+            yield _to_frame(batch)
+
+
+def _to_frame(table):
+    frame = table.to_pandas()
+    if 'Tags' in frame:
+        frame['Tags'] = frame['Tags'].map(lambda tags: list(tags) if tags is not None else [])
+    return frame
+
+
+def partitions(root=DATASET_DIR):
+    """
+    Returns:
+        list: (month, directory) pairs of the dataset partitions, in month order.
+    """
+    if not os.path.isdir(root):
+        return []
+    prefix = f'{PARTITION}='
+    return sorted(
+        (name[len(prefix):], os.path.join(root, name)) for name in os.listdir(root) if name.startswith(prefix)
+    )
+
+
+def map_partitions(func, root=DATASET_DIR):
+    """
+    Rewrites the dataset one month partition at a time.
+
+    Each partition is loaded (memory-mapped), passed to func, and written back as a
+    single file that replaces the old ones atomically. Memory use is bounded by the
+    largest month rather than the whole corpus.
+
+    Args:
+        func (callable): Takes and returns the DataFrame of one partition, e.g. with new score columns.
+        root (str): Dataset directory.
+    """
+    for month, directory in partitions(root):
+        frame = read_dataset(root, months=[month]).drop(columns=[PARTITION])
+        _write_partition(to_table(func(frame)).drop_columns([PARTITION]), root, directory)
+
+
+def update_column(name, func, columns, root=DATASET_DIR):
+    """
+    Replaces one column of the dataset, one month partition at a time.
+
+    Only the given columns of a partition are converted to pandas and passed to func; the
+    other columns (ArticleContent, ...) are carried over as Arrow data. Like map_partitions,
+    each partition is written back before the next one is read.
+
+    Args:
+        name (str): Schema column to replace, e.g. 'Difficulty_Score'.
+        func (callable): Takes the DataFrame of the requested columns of one partition and returns
+            the new values, in row order.
+        columns (list): Columns func reads, e.g. ['URL', 'Summary'].
+        root (str): Dataset directory.
+    """
+    field = SCHEMA.field(name)
+    for month, directory in partitions(root):
+        table = dataset(root).to_table(filter=ds.field(PARTITION) == month).drop_columns([PARTITION])
+        values = pa.array(func(_to_frame(table.select(columns))), field.type, from_pandas=True)
+        table = table.set_column(table.schema.get_field_index(name), field, values)
+        _write_partition(table, root, directory)
+
+
+def _write_partition(table, root, directory):
+    tmp_dir = os.path.join(root, f'.{os.path.basename(directory)}.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    pq.write_table(table, os.path.join(tmp_dir, 'part-0.parquet'), compression='zstd')
+    _replace_dir(tmp_dir, directory)
+
+
+def export(root=DATASET_DIR, json_path=None, csv_path=None, columns=None, chunk_size=10000):
+    """
+    Writes the dataset out as a JSON array and/or CSV, streaming it chunk by chunk.
+
+    These are optional final artifacts; pipeline stages read the Parquet dataset itself.
+
+    Args:
+        root (str): Dataset directory.
+        json_path (str): Destination .json file, or None to skip.
+        csv_path (str): Destination .csv file, or None to skip.
+        columns (list): Columns to export, in order; defaults to the corpus schema.
+        chunk_size (int): Rows read per chunk.
+
+    Returns:
+        int: Number of records written.
+    """
+    columns = columns or SCHEMA.names
+    records = (
+        record
+        for batch in dataset(root).to_batches(columns=columns, batch_size=chunk_size)
+        for record in batch.to_pylist()
+    )
+    return write_records(records, json_path=json_path, csv_path=csv_path, fields=columns)
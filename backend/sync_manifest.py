@@ -0,0 +1,115 @@
+import sqlite3
+import time
+
+from crawl_state import record_hash
+
+
+class SyncManifest:
+    def __init__(self, path='sync_manifest.sqlite'):
+        """
+        Local record of what the questions table holds: one content hash per row, keyed by URL.
+
+        Comparing the rows about to be uploaded with the manifest gives the delta to push, so a
+        run where nothing changed sends nothing. The manifest is only updated for rows the
+        server accepted, so failed rows are retried on the next run.
+
+        Args:
+            path (str): SQLite database path.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rows (
+                key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def diff(self, records, key='URL', include_unchanged=False):
+        """
+        Compares records with the manifest.
+
+        Records are consumed lazily and only new or changed ones are kept, so a stream
+        of rows can be diffed without holding it in memory.
+
+        Args:
+            records (iterable): Cleaned rows as they would be uploaded.
+            key (str): Field holding the stable row ID.
+            include_unchanged (bool): Return unchanged records with the updates (full re-upload).
+
+        Returns:
+            tuple: (inserts, updates, deletes, unchanged) - lists of new records, changed records,
+            and keys in the manifest that no longer appear in records, plus the number of unchanged records.
+        """
+        known = dict(self.conn.execute("SELECT key, content_hash FROM rows"))
+        inserts, updates, seen = [], [], set()
+        unchanged = 0
+        for record in records:
+            seen.add(record[key])
+            digest = known.get(record[key])
+            if digest is None:
+                inserts.append(record)
+            elif digest != record_hash(record):
+                updates.append(record)
+            else:
+                unchanged += 1
+                if include_unchanged:
+                    updates.append(record)
+        deletes = [row_key for row_key in known if row_key not in seen]
+        return inserts, updates, deletes, unchanged
+
+    def mark_synced(self, records, key='URL'):
+        """
+        Records that these rows are now in the table as given.
+        """
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO rows (key, content_hash, synced_at) VALUES (?, ?, ?)",
+            ((record[key], record_hash(record), now) for record in records),
+        )
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def adopt(self, keys):
+        """
+        Adds rows found in the table but missing from the manifest, e.g. uploaded before it existed.
+
+        They get an empty hash, so the next diff() treats them as changed when they are still in
+        the dataset (and re-upserts them) and deletes them when they are not.
+
+        Args:
+            keys (iterable): Key values present in the table.
+
+        Returns:
+            int: Number of keys added.
+        """
+        before = len(self)
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO rows (key, content_hash, synced_at) VALUES (?, '', ?)",
+            ((row_key, now) for row_key in keys),
+        )
+        self.conn.commit()
+        return len(self) - before
+
+    def forget(self, keys):
+        """
+        Removes deleted rows from the manifest.
+        """
+        self.conn.executemany("DELETE FROM rows WHERE key = ?", ((row_key,) for row_key in keys))
+        self.conn.commit()
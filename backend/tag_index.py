@@ -0,0 +1,154 @@
+import os
+import re
+
+import numpy as np
+
+from ratings import served_filter
+from storage import DATASET_DIR, read_dataset
+
+TAG_INDEX_PATH = 'snopes_tag_index.npz'
+
+
+def normalize_tag(tag):
+    """
+    Canonical form of a tag: case-folded with whitespace collapsed, so 'COVID-19 ' and 'covid-19' are one tag.
+    """
+    return re.sub(r'\s+', ' ', tag).strip().casefold()
+
+
+class TagIndex:
+    def __init__(self, tags, offsets, postings, urls):
+        """
+        Inverted index from tags to question IDs.
+
+        Question IDs are positions in the URL-sorted list of served questions (`urls`). Tag i has the integer ID i;
+        its posting list is the sorted slice postings[offsets[i]:offsets[i + 1]]. Multi-tag
+        queries intersect posting lists starting with the shortest: against a much longer list
+        by binary search, otherwise by probing a cached membership bitmap of the other tag.
+
+        Use TagIndex.build() to create one and save()/load() to persist it.
+
+        Args:
+            tags (list): Normalized tags; the index is the tag ID.
+            offsets (ndarray): int64 posting list boundaries, len(tags) + 1 entries.
+            postings (ndarray): uint32 question IDs, all posting lists concatenated.
+            urls (list): Question URLs in ID order.
+        """
+        self.tags = list(tags)
+        self.ids = {tag: tag_id for tag_id, tag in enumerate(self.tags)}
+        self.offsets = offsets
+        self.postings = postings
+        self.urls = list(urls)
+        self._bitmaps = {}
+
+    @classmethod
+    def build(cls, urls_and_tags):
+        """
+        Builds the index.
+
+        Args:
+            urls_and_tags (iterable): (url, list of tags) pairs, one per question.
+
+        Returns:
+            TagIndex: Tags are numbered in sorted order.
+        """
+        rows = sorted(urls_and_tags, key=lambda row: row[0])
+        question_ids, tag_names = [], []
+        for question_id, (_, tags) in enumerate(rows):
+            for tag in {normalize_tag(tag) for tag in tags if tag and tag.strip()}:
+                question_ids.append(question_id)
+                tag_names.append(tag)
+
+        tags, tag_ids = np.unique(np.array(tag_names, dtype=object), return_inverse=True) if tag_names else ([], [])
+        # Sort the (tag, question) pairs by tag, then question, to lay the posting lists out contiguously
+        order = np.lexsort((np.asarray(question_ids, dtype=np.uint32), np.asarray(tag_ids, dtype=np.int64)))
+        postings = np.asarray(question_ids, dtype=np.uint32)[order]
+        offsets = np.zeros(len(tags) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(np.asarray(tag_ids, dtype=np.int64), minlength=len(tags)), out=offsets[1:])
+        return cls(list(tags), offsets, postings, [url for url, _ in rows])
+
+    @classmethod
+    def from_dataset(cls, root=DATASET_DIR):
+        """
+        Builds the index from the URL and Tags columns of the served (Fake/Real) rows of the Parquet dataset.
+        """
+        frame = read_dataset(root, columns=['URL', 'Tags'], filter=served_filter())
+        return cls.build(zip(frame['URL'], frame['Tags']))
+
+    def save(self, path=TAG_INDEX_PATH):
+        # Written next to the target and renamed over it, so a reader never loads a half-written index
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, tags=np.array(self.tags, dtype=str), offsets=self.offsets, postings=self.postings,
+                     urls=np.array(self.urls, dtype=str))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=TAG_INDEX_PATH):
+        with np.load(path) as data:
+            return cls(data['tags'].tolist(), data['offsets'], data['postings'], data['urls'].tolist())
+
+    def __len__(self):
+        return len(self.tags)
+
+    def _tag_posting(self, tag_id):
+        return self.postings[self.offsets[tag_id]:self.offsets[tag_id + 1]]
+
+    def _bitmap(self, tag_id):
+        # Dense tags also get a boolean membership array so intersections with them are a single gather
+        bitmap = self._bitmaps.get(tag_id)
+        if bitmap is None:
+            bitmap = np.zeros(len(self.urls), dtype=bool)
+            bitmap[self._tag_posting(tag_id)] = True
+            self._bitmaps[tag_id] = bitmap
+        return bitmap
+
+    def posting(self, tag):
+        """
+        Returns:
+            ndarray: Sorted question IDs carrying the tag (empty for unknown tags).
+        """
+        tag_id = self.ids.get(normalize_tag(tag))
+        if tag_id is None:
+            return self.postings[:0]
+        return self._tag_posting(tag_id)
+
+    def query(self, tags, match='all'):
+        """
+        Question IDs matching several tags.
+
+        Args:
+            tags (iterable): Tags to look up.
+            match (str): 'all' intersects the posting lists, 'any' unites them.
+
+        Returns:
+            ndarray: Sorted question IDs.
+        """
+        tag_ids = [self.ids.get(normalize_tag(tag)) for tag in tags]
+        if not tag_ids:
+            return self.postings[:0]
+        if match == 'any':
+            return np.unique(np.concatenate([self._tag_posting(tag_id) for tag_id in tag_ids if tag_id is not None]
+                                            or [self.postings[:0]]))
+        if None in tag_ids:
+            return self.postings[:0]
+        tag_ids.sort(key=lambda tag_id: self.offsets[tag_id + 1] - self.offsets[tag_id])
+        result = self._tag_posting(tag_ids[0])
+        for tag_id in tag_ids[1:]:
+            if not len(result):
+                break
+            posting = self._tag_posting(tag_id)
+            if len(result) * 16 < len(posting):
+                # Much shorter: binary-search each remaining ID in the longer list
+                positions = np.minimum(np.searchsorted(posting, result), len(posting) - 1)
+                result = result[posting[positions] == result]
+            else:
+                result = result[self._bitmap(tag_id)[result]]
+        return result
+
+    def counts(self):
+        """
+        Returns:
+            dict: tag -> number of questions carrying it.
+        """
+        return dict(zip(self.tags, np.diff(self.offsets).tolist()))
@@ -0,0 +1,122 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetcher
+from fetcher import Fetcher, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fetcher, 'time', clock)
+    return clock
+
+
+def test_token_bucket_spends_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [1.0]
+
+
+def test_token_bucket_without_rate_never_waits(clock):
+    bucket = TokenBucket(rate=0)
+    for _ in range(100):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+
+@pytest.fixture
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/missing'):
+                self.send_error(404)
+                return
+            if self.path.startswith('/slow'):
+                time.sleep(0.2)
+            body = self.path.encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_all_yields_errors_and_keeps_order(server):
+    urls = [f'{server}/slow', f'{server}/a', f'{server}/missing', f'{server}/b']
+    with Fetcher(concurrency=4, rate_per_host=0) as client:
+        results = list(client.fetch_all(urls, ordered=True))
+    assert [url for url, _, _ in results] == urls
+    assert [response.text for _, response, _ in results if response is not None] == ['/slow', '/a', '/b']
+    assert results[2][1] is None and results[2][2].response.status_code == 404
+
+
+def test_fetch_all_completion_order(server):
+    with Fetcher(concurrency=4, rate_per_host=0) as client:
+        results = list(client.fetch_all([f'{server}/slow', f'{server}/fast']))
+    assert [url.rsplit('/', 1)[1] for url, _, _ in results] == ['fast', 'slow']
+
+
+def test_fetch_all_rate_limits_each_host(server):
+    urls = [f'{server}/{i}' for i in range(5)]
+    with Fetcher(concurrency=5, rate_per_host=20) as client:
+        start = time.monotonic()
+        assert all(error is None for _, _, error in client.fetch_all(urls))
+        elapsed = time.monotonic() - start
+    # One request goes out right away, the other four wait 1/20 s each
+    assert elapsed >= 0.19
+
+
+def test_fetch_all_bounds_buffered_requests(server):
+    submitted = []
+
+    def urls():
+        for i in range(20):
+            submitted.append(i)
+            yield f'{server}/{i}'
+
+    with Fetcher(concurrency=2, rate_per_host=0) as client:
+        results = client.fetch_all(urls(), max_buffered=3)
+        next(results)
+        assert len(submitted) <= 4
+        assert len(list(results)) == 19
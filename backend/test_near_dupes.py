@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from near_dupes import MinHasher, canonical_urls, clusters, lsh_pairs
+
+
+def test_lsh_pairs_compares_every_pair_in_small_buckets():
+    rng = np.random.default_rng(0)
+    signatures = rng.integers(0, 2**32 - 1, (6, 8), dtype=np.uint32)
+    # Rows 1, 3 and 5 share the first band; 3 and 5 also agree everywhere else, 1 agrees with neither
+    signatures[[1, 3, 5], :4] = 7
+    signatures[5, 4:] = signatures[3, 4:]
+    pairs = lsh_pairs(signatures, bands=2, threshold=0.9)
+    assert pairs.tolist() == [[3, 5]]
+
+
+def test_lsh_pairs_links_large_buckets_through_first_member():
+    rng = np.random.default_rng(1)
+    signatures = rng.integers(0, 2**32 - 1, (40, 12), dtype=np.uint32)
+    signatures[:, :4] = 7
+    # 30 and 35 agree with row 0 on 10 of 12 values but share no other band, so outside the
+    # window of the 40-member bucket they are only compared with its first member
+    signatures[[30, 35], 4:7] = signatures[0, 4:7]
+    signatures[[30, 35], 8:11] = signatures[0, 8:11]
+    pairs = lsh_pairs(signatures, bands=3, threshold=0.8, max_bucket=4)
+    assert pairs.tolist() == [[0, 30], [0, 35]]
+    assert len(set(clusters(40, pairs)[[0, 30, 35]])) == 1
+
+
+def test_lsh_pairs_ignores_rows_without_shingles():
+    signatures = MinHasher(64).signatures(['one', 'two', 'a claim about the moon landing'], k=2)
+    assert lsh_pairs(signatures, bands=16).tolist() == []
+
+
+def test_canonical_urls_picks_earliest_duplicate():
+    frame = pd.DataFrame({
+        'URL': ['b', 'a', 'c'],
+        'Date': ['2024-03-01', '2024-01-01', '2024-02-01'],
+        'Title': ['', '', ''],
+        'Summary': ['', '', ''],
+        'Claim': ['Photo shows a shark swimming on a flooded highway after the hurricane'] * 2
+                 + ['Senator proposed banning daylight saving time in every state'],
+    })
+    assert canonical_urls(frame).tolist() == ['a', 'a', 'c']
@@ -0,0 +1,75 @@
+import random
+from datetime import date
+
+import pytest
+
+from quiz_api import QuizIndex, parse_query, question_id
+from storage import UNKNOWN_MONTH
+
+
+def question(n, day, rating='False', tags=('politics',)):
+    return {'Title': f'Claim {n}', 'URL': f'https://www.snopes.com/fact-check/{n}/', 'Date': day,
+            'Summary': '', 'Rating': rating, 'Tags': list(tags), 'Month': day[:7] if day else UNKNOWN_MONTH}
+
+
+def questions():
+    return [
+        question(1, '2024-01-10'),
+        question(2, '2024-02-10', rating='True', tags=('science',)),
+        question(3, '2024-03-10', tags=('politics', 'science')),
+        question(4, None),
+        question(5, '2024-03-20', rating='Research In Progress'),
+    ]
+
+
+def test_ids_are_url_hashes_that_survive_new_rows():
+    index = QuizIndex(questions())
+    grown = QuizIndex(questions() + [question(0, '2023-12-01')])
+    ids = {item['URL']: item['id'] for item in index.questions}
+    assert ids['https://www.snopes.com/fact-check/3/'] == question_id('https://www.snopes.com/fact-check/3/')
+    assert all(ids[item['URL']] == item['id'] for item in grown.questions if item['URL'] in ids)
+
+
+def test_ambiguous_ratings_are_not_served():
+    index = QuizIndex(questions())
+    assert len(index) == 4
+    assert len(index.sample(10, rng=random.Random(0))) == 4
+
+
+def test_exclude_takes_public_ids():
+    index = QuizIndex(questions())
+    excluded = {question_id('https://www.snopes.com/fact-check/1/'), 'not-an-id'}
+    urls = {item['URL'] for item in index.sample(10, exclude=excluded, rng=random.Random(0))}
+    assert 'https://www.snopes.com/fact-check/1/' not in urls
+    assert len(urls) == 3
+
+
+def test_date_ranges_skip_the_undated_bucket():
+    index = QuizIndex(questions())
+    assert UNKNOWN_MONTH not in index.months
+    pools = index._pools(None, 'all', date(2024, 2, 1), None, ('Fake', 'Real'))
+    assert sum(len(pool) for pool in pools) == 2
+    sampled = index.sample(10, since=date(2024, 2, 1), rng=random.Random(0))
+    assert sorted(item['Title'] for item in sampled) == ['Claim 2', 'Claim 3']
+    # Without a range the undated question is drawn too
+    assert 'Claim 4' in {item['Title'] for item in index.sample(10, rng=random.Random(0))}
+
+
+def test_tag_queries():
+    index = QuizIndex(questions())
+    sampled = index.sample(10, tags=['Politics', 'science'], match='all', rng=random.Random(0))
+    assert [item['Title'] for item in sampled] == ['Claim 3']
+    sampled = index.sample(10, tags=['science'], until=date(2024, 2, 28), rng=random.Random(0))
+    assert [item['Title'] for item in sampled] == ['Claim 2']
+
+
+def test_parse_query():
+    params = parse_query('n=500&tag=a,b&match=any&exclude=x,%20y,&since=2024-01-01')
+    assert params['n'] == 200
+    assert params['tags'] == ['a', 'b']
+    assert params['exclude'] == {'x', 'y'}
+    assert params['since'] == date(2024, 1, 1)
+    with pytest.raises(ValueError):
+        parse_query('range=decade')
+    with pytest.raises(ValueError):
+        parse_query('match=some')
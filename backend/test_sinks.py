@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from sinks import iter_json_array, iter_jsonl, iter_unique, write_records
+
+RECORDS = [
+    {'Title': 'Did a "cat" run for mayor?', 'Tags': ['politics', 'animals'], 'Score': 0.125},
+    {'Title': 'Über-long claim, with commas ] and brackets [', 'Tags': [], 'Score': None},
+    {'Title': 'Numbers', 'Tags': ['math'], 'Score': 123456789},
+]
+
+
+@pytest.mark.parametrize('read_size', [1, 2, 3, 5, 7, 64, 1 << 20])
+def test_iter_json_array_matches_json_load(tmp_path, read_size):
+    path = tmp_path / 'records.json'
+    write_records(RECORDS, json_path=str(path))
+    assert list(iter_json_array(str(path), read_size=read_size)) == json.loads(path.read_text(encoding='utf-8'))
+
+
+@pytest.mark.parametrize('read_size', range(1, 12))
+def test_iter_json_array_does_not_split_numbers(tmp_path, read_size):
+    path = tmp_path / 'numbers.json'
+    path.write_text('[12345, 6, -7.25e3,true ,null,"x"]', encoding='utf-8')
+    assert list(iter_json_array(str(path), read_size=read_size)) == [12345, 6, -7250.0, True, None, 'x']
+
+
+def test_iter_json_array_empty_and_truncated(tmp_path):
+    empty = tmp_path / 'empty.json'
+    write_records([], json_path=str(empty))
+    assert list(iter_json_array(str(empty))) == []
+
+    truncated = tmp_path / 'truncated.json'
+    truncated.write_text('[{"a": 1}, {"a": 2', encoding='utf-8')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(str(truncated), read_size=4))
+
+    not_array = tmp_path / 'object.json'
+    not_array.write_text('{"a": 1}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(not_array)))
+
+
+def test_iter_unique_keeps_last_record_and_skips_torn_line(tmp_path):
+    path = tmp_path / 'records.jsonl'
+    path.write_text('{"URL": "a", "v": 1}\n{"URL": "b", "v": 1}\n{"URL": "a", "v": 2}\n{"URL": "c", "v"',
+                    encoding='utf-8')
+    assert len(list(iter_jsonl(str(path)))) == 3
+    assert list(iter_unique(str(path), 'URL')) == [{'URL': 'b', 'v': 1}, {'URL': 'a', 'v': 2}]
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from storage import append_dataset, partitions, read_dataset, update_column, upsert_dataset
+
+
+def article(url, date='2024-01-15', summary='A claim.', **fields):
+    return {'Title': url.title(), 'URL': url, 'Date': date, 'Summary': summary, 'Rating': 'False',
+            'Tags': ['politics'], 'ArticleContent': f'Body of {url}', **fields}
+
+
+def rows(root):
+    return read_dataset(str(root)).set_index('URL').sort_index()
+
+
+def test_upsert_keeps_other_rows_and_unchanged_scores(tmp_path):
+    root = tmp_path / 'dataset'
+    # Rows stored by the Scrapy pipeline, already scored
+    append_dataset(pd.DataFrame([
+        article('pipeline', Difficulty='Hard', Difficulty_Score=0.9),
+        article('same', Difficulty='Easy', Difficulty_Score=0.1),
+        article('edited', Difficulty='Easy', Difficulty_Score=0.2),
+        article('moved', date='2023-05-01', Difficulty='Medium', Difficulty_Score=0.5),
+    ]), str(root))
+
+    written = upsert_dataset(pd.DataFrame([
+        article('same'),
+        article('edited', summary='A corrected claim.'),
+        article('moved', date='2024-02-01'),
+        article('new', date='2024-03-01'),
+    ]), str(root))
+
+    stored = rows(root)
+    assert written == 4
+    assert sorted(stored.index) == ['edited', 'moved', 'new', 'pipeline', 'same']
+    assert stored.loc['pipeline', 'Difficulty_Score'] == 0.9
+    assert stored.loc['same', 'Difficulty_Score'] == 0.1
+    assert pd.isna(stored.loc['edited', 'Difficulty_Score'])
+    assert stored.loc['edited', 'Summary'] == 'A corrected claim.'
+    assert stored.loc['moved', 'Month'] == '2024-02'
+    assert stored.loc['moved', 'Difficulty'] == 'Medium'
+    assert [month for month, _ in partitions(str(root))] == ['2024-01', '2024-02', '2024-03']
+
+
+def test_upsert_into_missing_dataset_and_duplicate_keys(tmp_path):
+    root = tmp_path / 'dataset'
+    upsert_dataset([pd.DataFrame([article('a'), article('b')]),
+                    pd.DataFrame([article('a', summary='Second version.')])], str(root))
+    stored = rows(root)
+    assert list(stored.index) == ['a', 'b']
+    assert stored.loc['a', 'Summary'] == 'Second version.'
+    assert stored.loc['a', 'Tags'] == ['politics']
+
+
+def test_update_column_only_passes_requested_columns(tmp_path):
+    root = tmp_path / 'dataset'
+    append_dataset(pd.DataFrame([article('a'), article('b', date='2024-02-01')]), str(root))
+    seen = []
+
+    def score(frame):
+        seen.append(list(frame.columns))
+        return [len(summary) / 10 for summary in frame['Summary']]
+
+    update_column('Difficulty_Score', score, ['URL', 'Summary'], str(root))
+    stored = rows(root)
+    assert seen == [['URL', 'Summary'], ['URL', 'Summary']]
+    assert list(stored['Difficulty_Score']) == [0.8, 0.8]
+    assert stored.loc['b', 'ArticleContent'] == 'Body of b'
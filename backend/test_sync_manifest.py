@@ -0,0 +1,63 @@
+from sync_manifest import SyncManifest
+from upload_db import reconcile_manifest
+
+
+def row(n, title=None):
+    return {'URL': f'https://www.snopes.com/{n}', 'Title': title or f'Claim {n}'}
+
+
+def test_diff_finds_inserts_updates_deletes(tmp_path):
+    with SyncManifest(str(tmp_path / 'manifest.sqlite')) as manifest:
+        manifest.mark_synced([row(1), row(2), row(3)])
+        inserts, updates, deletes, unchanged = manifest.diff(iter([row(1), row(2, 'Edited'), row(4)]))
+    assert inserts == [row(4)]
+    assert updates == [row(2, 'Edited')]
+    assert deletes == ['https://www.snopes.com/3']
+    assert unchanged == 1
+
+
+def test_full_diff_includes_unchanged_rows(tmp_path):
+    with SyncManifest(str(tmp_path / 'manifest.sqlite')) as manifest:
+        manifest.mark_synced([row(1)])
+        _, updates, _, unchanged = manifest.diff([row(1)], include_unchanged=True)
+    assert updates == [row(1)] and unchanged == 1
+
+
+def test_only_synced_rows_leave_the_delta(tmp_path):
+    path = str(tmp_path / 'manifest.sqlite')
+    with SyncManifest(path) as manifest:
+        inserts, *_ = manifest.diff([row(1), row(2)])
+        # Only row 1 was accepted by the server
+        manifest.mark_synced(inserts[:1])
+    with SyncManifest(path) as manifest:
+        inserts, updates, deletes, unchanged = manifest.diff([row(1), row(2)])
+        assert inserts == [row(2)] and updates == [] and deletes == [] and unchanged == 1
+        manifest.forget(['https://www.snopes.com/1'])
+        assert len(manifest) == 0
+
+
+def test_adopted_rows_are_resent_or_deleted(tmp_path):
+    with SyncManifest(str(tmp_path / 'manifest.sqlite')) as manifest:
+        manifest.mark_synced([row(1)])
+        assert manifest.adopt(['https://www.snopes.com/1', 'https://www.snopes.com/2',
+                               'https://www.snopes.com/3']) == 2
+        inserts, updates, deletes, unchanged = manifest.diff([row(1), row(2)])
+    assert inserts == [] and updates == [row(2)] and deletes == ['https://www.snopes.com/3'] and unchanged == 1
+
+
+class TableStub:
+    def __init__(self, keys):
+        self.keys = keys
+
+    def fetch_column(self, column):
+        assert column == 'URL'
+        return list(self.keys)
+
+
+def test_reconcile_manifest_adopts_untracked_rows(tmp_path):
+    with SyncManifest(str(tmp_path / 'manifest.sqlite')) as manifest:
+        manifest.mark_synced([row(1)])
+        table = TableStub(['https://www.snopes.com/1', 'https://www.snopes.com/2', None])
+        assert reconcile_manifest(manifest, table) == 1
+        assert reconcile_manifest(manifest, table) == 0
+        assert len(manifest) == 2
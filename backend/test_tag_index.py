@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import append_dataset
+from tag_index import TagIndex
+
+
+def brute_force(rows, tags, match):
+    wanted = {tag.casefold() for tag in tags}
+    combine = all if match == 'all' else any
+    return [i for i, (_, row_tags) in enumerate(sorted(rows))
+            if combine(tag in {t.casefold() for t in row_tags} for tag in wanted)]
+
+
+@pytest.fixture(scope='module')
+def rows():
+    rng = random.Random(7)
+    # Tag sizes from a handful of questions to nearly all of them, so both intersection paths run
+    weights = {'common': 0.9, 'politics': 0.4, 'science': 0.2, 'covid-19': 0.05, 'rare': 0.005}
+    return [(f'https://www.snopes.com/{i:05d}', [tag for tag, p in weights.items() if rng.random() < p])
+            for i in range(4000)]
+
+
+@pytest.mark.parametrize('tags', [['politics'], ['common', 'rare'], ['rare', 'common', 'politics'],
+                                  ['science', 'covid-19'], ['politics', 'science', 'common']])
+@pytest.mark.parametrize('match', ['all', 'any'])
+def test_query_matches_brute_force(rows, tags, match):
+    index = TagIndex.build(rows)
+    assert index.query(tags, match=match).tolist() == brute_force(rows, tags, match)
+
+
+def test_tags_are_normalized():
+    index = TagIndex.build([('b', ['COVID-19 ', 'Politics']), ('a', ['covid-19', '  ', ''])])
+    assert index.urls == ['a', 'b']
+    assert index.counts() == {'covid-19': 2, 'politics': 1}
+    assert index.posting('Covid-19').tolist() == [0, 1]
+    assert index.query(['covid-19', 'POLITICS']).tolist() == [1]
+
+
+def test_unknown_and_empty_queries():
+    index = TagIndex.build([('a', ['x'])])
+    assert index.posting('nope').tolist() == []
+    assert index.query(['x', 'nope']).tolist() == []
+    assert index.query(['x', 'nope'], match='any').tolist() == [0]
+    assert index.query([]).tolist() == []
+    assert len(TagIndex.build([])) == 0
+
+
+def test_save_load_round_trip(rows, tmp_path):
+    index = TagIndex.build(rows)
+    path = str(tmp_path / 'tags.npz')
+    index.save(path)
+    loaded = TagIndex.load(path)
+    assert loaded.tags == index.tags and loaded.urls == index.urls
+    assert np.array_equal(loaded.postings, index.postings)
+    assert loaded.query(['politics', 'science']).tolist() == index.query(['politics', 'science']).tolist()
+
+
+def test_from_dataset_indexes_served_rows_only(tmp_path):
+    root = str(tmp_path / 'dataset')
+    append_dataset(pd.DataFrame([
+        {'URL': 'b', 'Date': '2024-01-01', 'Rating': 'False', 'Tags': ['Politics']},
+        {'URL': 'a', 'Date': '2024-02-01', 'Rating': 'True', 'Tags': ['science', 'politics']},
+        {'URL': 'c', 'Date': '2024-02-01', 'Rating': 'Research In Progress', 'Tags': ['politics']},
+    ]), root)
+    index = TagIndex.from_dataset(root)
+    assert index.urls == ['a', 'b']
+    assert index.counts() == {'politics': 2, 'science': 1}
@@ -0,0 +1,161 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from sinks import iter_jsonl
+from uploader import BulkUploader
+
+
+class FakePostgrest:
+    """
+    Minimal stand-in for the questions endpoint, with knobs for the failures under test.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.posts = []
+        self.transient = 0
+        self.max_body = None
+        self.error_code = None
+        self.lock = threading.Lock()
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, payload=None):
+                body = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                with server.lock:
+                    server.posts.append(len(body))
+                    if server.transient:
+                        server.transient -= 1
+                        return self._reply(503, {'message': 'unavailable'})
+                if server.error_code:
+                    return self._reply(400, {'code': server.error_code, 'message': 'no unique constraint'})
+                if server.max_body and len(body) > server.max_body:
+                    return self._reply(413, {'message': 'payload too large'})
+                records = json.loads(body)
+                if any(record.get('bad') for record in records):
+                    return self._reply(400, {'code': '22P02', 'message': 'invalid input'})
+                with server.lock:
+                    server.rows.update((record['URL'], record) for record in records)
+                self._reply(201)
+
+            def do_DELETE(self):
+                urls = parse_qs(urlsplit(self.path).query)['URL'][0][len('in.('):-1]
+                with server.lock:
+                    for url in json.loads(f'[{urls}]'):
+                        server.rows.pop(url, None)
+                self._reply(204)
+
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+                offset, limit = int(query['offset']), int(query['limit'])
+                with server.lock:
+                    urls = sorted(server.rows)[offset:offset + limit]
+                self._reply(200, [{'URL': url} for url in urls])
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def postgrest():
+    fake = FakePostgrest()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), fake.handler())
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    fake.url = f'http://127.0.0.1:{httpd.server_port}'
+    yield fake
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def make_uploader(postgrest, tmp_path):
+    def make(**options):
+        options = {'concurrency': 2, 'max_retries': 2, 'backoff': 0, 'on_conflict': 'URL',
+                   'dead_letter_path': str(tmp_path / 'dead.jsonl'), **options}
+        return BulkUploader(postgrest.url, 'key', **options)
+    return make
+
+
+def records(n, bad=()):
+    return [{'URL': f'https://www.snopes.com/{i:03d}', 'Title': f'Claim {i}', 'bad': i in bad} for i in range(n)]
+
+
+def test_upsert_batches_and_reports_accepted_rows(postgrest, make_uploader):
+    accepted = []
+    with make_uploader(max_batch_rows=10) as uploader:
+        stats = uploader.upsert(records(35), on_uploaded=accepted.extend)
+    assert stats['uploaded'] == 35 and stats['requests'] == 4
+    assert len(postgrest.rows) == 35
+    assert sorted(record['URL'] for record in accepted) == sorted(postgrest.rows)
+
+
+def test_transient_errors_are_retried(postgrest, make_uploader):
+    postgrest.transient = 2
+    with make_uploader(max_batch_rows=10) as uploader:
+        stats = uploader.upsert(records(10))
+    assert stats['uploaded'] == 10 and stats['retries'] == 2 and stats['aborted'] is None
+
+
+def test_rejected_rows_are_isolated_and_dead_lettered(postgrest, make_uploader, tmp_path):
+    with make_uploader(max_batch_rows=16) as uploader:
+        stats = uploader.upsert(records(16, bad={3, 12}))
+    assert stats['uploaded'] == 14 and stats['dead_lettered'] == 2
+    dead = list(iter_jsonl(str(tmp_path / 'dead.jsonl')))
+    assert sorted(entry['record']['Title'] for entry in dead) == ['Claim 12', 'Claim 3']
+    assert all('HTTP 400' in entry['error'] for entry in dead)
+
+
+def test_payload_too_large_shrinks_later_batches(postgrest, make_uploader):
+    postgrest.max_body = 1500
+    with make_uploader(concurrency=1, max_batch_bytes=4096) as uploader:
+        stats = uploader.upsert(records(40))
+        assert uploader.max_batch_bytes <= 1500
+    assert stats['uploaded'] == 40 and stats['dead_lettered'] == 0
+    assert len(postgrest.rows) == 40
+
+
+def test_exhausted_retries_abort_without_bisecting(postgrest, make_uploader, tmp_path):
+    postgrest.transient = 10 ** 6
+    with make_uploader(max_batch_rows=10) as uploader:
+        stats = uploader.upsert(records(40))
+    # Three attempts for each batch in flight, never a split
+    assert stats['aborted'] and 'HTTP 503' in stats['aborted']
+    assert stats['uploaded'] == 0 and stats['dead_lettered'] == 0 and stats['skipped'] == 40
+    assert len(postgrest.posts) <= 3 * 2
+    assert not (tmp_path / 'dead.jsonl').exists()
+
+
+def test_missing_unique_constraint_aborts(postgrest, make_uploader):
+    postgrest.error_code = '42P10'
+    with make_uploader(max_batch_rows=10) as uploader:
+        stats = uploader.upsert(records(20))
+        failed = uploader.delete(['https://www.snopes.com/000'], 'URL')
+    assert stats['aborted'] and stats['dead_lettered'] == 0 and stats['skipped'] == 20
+    assert failed == ['https://www.snopes.com/000']
+
+
+def test_delete_and_fetch_column(postgrest, make_uploader):
+    quoted = 'https://www.snopes.com/"quoted",(x)'
+    with make_uploader() as uploader:
+        uploader.upsert(records(5) + [{'URL': quoted, 'Title': 'Odd'}])
+        assert uploader.fetch_column('URL', page_size=2) == sorted(postgrest.rows)
+        failed = uploader.delete(['https://www.snopes.com/001', quoted], 'URL', batch_size=1)
+    assert failed == []
+    assert sorted(postgrest.rows) == [f'https://www.snopes.com/{i:03d}' for i in (0, 2, 3, 4)]
@@ -0,0 +1,114 @@
+import pytest
+
+torch = pytest.importorskip('torch')
+transformers = pytest.importorskip('transformers')
+
+import zero_shot
+from score_cache import ScoreCache
+from zero_shot import CANDIDATE_LABELS, HYPOTHESIS_TEMPLATE, ZeroShotEngine, get_engine
+
+WORDS = ('this example is easy hard to know the moon landing was faked a cat ran for mayor '
+         'vaccines contain microchips senator said water is wet .').split()
+TEXTS = ['the moon landing was faked', '', 'a cat ran for mayor', None,
+         'vaccines contain microchips senator said water is wet', 'water is wet']
+
+
+def assert_scores(actual, expected):
+    assert [scores is None for scores in actual] == [scores is None for scores in expected]
+    for got, want in zip(actual, expected):
+        if want is not None:
+            assert got == pytest.approx(want, abs=1e-5)
+
+
+@pytest.fixture(scope='module')
+def model_dir(tmp_path_factory):
+    """
+    A tiny randomly initialized BART MNLI model with a word-level tokenizer, saved like a hub model.
+    """
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import BartConfig, BartForSequenceClassification, PreTrainedTokenizerFast
+
+    vocab = {token: i for i, token in enumerate(['<s>', '<pad>', '</s>', '<unk>', *dict.fromkeys(WORDS)])}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token='<unk>'))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single='<s> $A </s>', pair='<s> $A </s> </s> $B </s>', special_tokens=[('<s>', 0), ('</s>', 2)],
+    )
+    labels = {0: 'contradiction', 1: 'neutral', 2: 'entailment'}
+    config = BartConfig(
+        vocab_size=len(vocab), d_model=16, encoder_layers=1, decoder_layers=1, encoder_attention_heads=2,
+        decoder_attention_heads=2, encoder_ffn_dim=32, decoder_ffn_dim=32, max_position_embeddings=64, init_std=0.5,
+        id2label=labels, label2id={label: i for i, label in labels.items()},
+    )
+    torch.manual_seed(0)
+    path = tmp_path_factory.mktemp('tiny-mnli')
+    BartForSequenceClassification(config).save_pretrained(path)
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token='<s>', eos_token='</s>', pad_token='<pad>',
+                            unk_token='<unk>').save_pretrained(path)
+    return str(path)
+
+
+def test_scores_match_the_zero_shot_pipeline(model_dir):
+    from transformers import pipeline
+
+    classifier = pipeline('zero-shot-classification', model=model_dir, device=-1)
+    engine = ZeroShotEngine(model_dir)
+    scores = engine.score(TEXTS, batch_size=2)
+    for text, label_scores in zip(TEXTS, scores):
+        if not text:
+            assert label_scores is None
+            continue
+        expected = classifier(text, CANDIDATE_LABELS, hypothesis_template=HYPOTHESIS_TEMPLATE)
+        expected = dict(zip(expected['labels'], expected['scores']))
+        assert label_scores == pytest.approx([expected[label] for label in CANDIDATE_LABELS], abs=1e-5)
+
+
+def test_batching_and_length_sorting_keep_input_order(model_dir):
+    engine = ZeroShotEngine(model_dir)
+    one_by_one = [engine.score([text])[0] for text in TEXTS]
+    assert_scores(engine.score(TEXTS, batch_size=4), one_by_one)
+
+
+def test_failing_batch_is_retried_per_text(model_dir, monkeypatch):
+    engine = ZeroShotEngine(model_dir)
+    forward = engine._forward
+
+    def flaky(texts):
+        if len(texts) > 1 or texts[0] == 'water is wet':
+            raise RuntimeError('boom')
+        return forward(texts)
+
+    expected = engine.score(TEXTS)
+    monkeypatch.setattr(engine, '_forward', flaky)
+    scores = engine.score(TEXTS, batch_size=8)
+    assert scores[-1] is None
+    assert_scores(scores[:-1], expected[:-1])
+
+
+def test_cache_hits_skip_the_model(model_dir, tmp_path, monkeypatch):
+    engine = ZeroShotEngine(model_dir)
+    with ScoreCache(str(tmp_path / 'cache.sqlite')) as cache:
+        first = engine.score(TEXTS, cache=cache)
+        monkeypatch.setattr(engine, '_forward', lambda texts: pytest.fail('cache miss'))
+        assert engine.score(TEXTS, cache=cache) == first
+
+
+def test_classify_returns_top_label_and_difficulty_score(model_dir):
+    engine = ZeroShotEngine(model_dir)
+    labels, scores = engine.classify(TEXTS[:2])
+    label_scores = engine.score(TEXTS[:1])[0]
+    assert labels == [CANDIDATE_LABELS[label_scores.index(max(label_scores))], None]
+    assert scores[0] == pytest.approx(label_scores[CANDIDATE_LABELS.index('Hard to Know')])
+    assert scores[1] != scores[1]
+
+
+def test_engines_are_shared_and_load_lazily(model_dir, monkeypatch):
+    monkeypatch.setattr(zero_shot, '_engines', {})
+    engine = get_engine(model_dir)
+    assert get_engine(model_dir) is engine
+    assert get_engine(model_dir, backend='int8') is not engine
+    assert engine.backend is None
+    engine.score(['', None])
+    assert engine.backend is None
+    with pytest.raises(ValueError):
+        ZeroShotEngine(model_dir, backend='tpu')
@@ -0,0 +1,304 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+from sinks import JsonLinesSink
+
+# Statuses worth retrying as-is; any other error means the batch itself is rejected
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# PostgreSQL error codes that reject every batch alike: 42P10 means no unique constraint
+# matches on_conflict (see migrations/questions_url_unique.sql), 42P01/42703 a missing table or column
+FATAL_CODES = {'42P10', '42P01', '42703'}
+
+
+class UploadError(Exception):
+    def __init__(self, status, message, fatal=False):
+        super().__init__(f"HTTP {status}: {message}" if status else message)
+        self.status = status
+        # Set when the failure says nothing about the rows themselves (retries ran out, or the
+        # table is not set up for the upsert), so splitting the batch cannot help
+        self.fatal = fatal
+
+
+def _error_code(response):
+    try:
+        return response.json().get('code')
+    except (ValueError, AttributeError):
+        return None
+
+
+class BulkUploader:
+    def __init__(self, base_url, api_key, table='questions', on_conflict='Title', concurrency=4,
+                 max_batch_bytes=256 * 1024, max_batch_rows=500, max_retries=5, backoff=0.5, max_backoff=30.0,
+                 timeout=60, dead_letter_path='upload_dead_letter.jsonl'):
+        """
+        Concurrent bulk upserts against a PostgREST endpoint (the REST API behind Supabase).
+
+        Records are packed into batches of at most max_batch_bytes of JSON, and several batches
+        are in flight at once over a pooled session. Transient failures (connection errors,
+        429 and 5xx) are retried with exponential backoff and full jitter; when the retries run
+        out the server is considered down and the run is aborted, leaving the remaining rows
+        for the next sync, as it is when the table lacks the on_conflict constraint. A batch
+        the server rejects (400, 409, 422, ...) is split in half until the offending rows are
+        isolated; those rows go to the dead-letter file with the error. A 413 also shrinks the
+        byte budget for later batches.
+
+        Args:
+            base_url (str): Project URL, e.g. https://<project>.supabase.co (or a local stand-in).
+            api_key (str): API key, sent as apikey and bearer token.
+            table (str): Target table.
+            on_conflict (str): Column(s) of the unique constraint used for upserts.
+            concurrency (int): Batches in flight.
+            max_batch_bytes (int): Target JSON payload size per request.
+            max_batch_rows (int): Upper bound on rows per request.
+            max_retries (int): Retries per request for transient failures.
+            backoff (float): Base delay in seconds; doubles per retry.
+            max_backoff (float): Delay cap in seconds.
+            timeout (float): Per-request timeout in seconds.
+            dead_letter_path (str): JSON Lines file receiving rows that could not be uploaded.
+        """
+        self.endpoint = f"{base_url.rstrip('/')}/rest/v1/{table}"
+        self.on_conflict = on_conflict
+        self.concurrency = concurrency
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_rows = max_batch_rows
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.dead_letter_path = dead_letter_path
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'apikey': api_key,
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json',
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="upload")
+
+        self._lock = threading.Lock()
+        self._dead_letter = None
+        self.stats = {'uploaded': 0, 'deleted': 0, 'dead_lettered': 0, 'skipped': 0, 'requests': 0, 'retries': 0,
+                      'aborted': None}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+        if self._dead_letter is not None:
+            self._dead_letter.close()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+        METRICS.count(f'upload_{name}_total', n)
+
+    def _reject(self, record, error):
+        with self._lock:
+            if self._dead_letter is None:
+                self._dead_letter = JsonLinesSink(self.dead_letter_path, mode='a', fsync_every=1)
+            self._dead_letter.write({'record': record, 'error': str(error), 'time': time.time()})
+            self.stats['dead_lettered'] += 1
+        METRICS.count('upload_dead_lettered_total')
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _request(self, method, params, body=None, prefer='return=minimal'):
+        """
+        Sends one request, retrying transient failures.
+
+        Returns:
+            requests.Response: The successful response.
+
+        Raises:
+            UploadError: When the request is rejected or retries are exhausted.
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            self._count('requests')
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, self.endpoint, data=body, params=params, timeout=self.timeout, headers={'Prefer': prefer},
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                METRICS.count('upload_connection_errors_total', method=method)
+                error, response = UploadError(None, str(e)), None
+            else:
+                METRICS.observe('upload_request_seconds', time.perf_counter() - start, method=method)
+                METRICS.count('upload_responses_total', method=method, status=response.status_code)
+                if response.status_code < 300:
+                    return response
+                error = UploadError(response.status_code, response.text[:500])
+                if response.status_code == 413 and body is not None:
+                    # Payload too large: send smaller batches from now on
+                    with self._lock:
+                        self.max_batch_bytes = max(1024, min(self.max_batch_bytes, len(body) // 2))
+                    raise error
+                if response.status_code not in RETRY_STATUSES:
+                    error.fatal = _error_code(response) in FATAL_CODES
+                    raise error
+            if attempt < self.max_retries:
+                time.sleep(self._delay(attempt, response))
+        error.fatal = True
+        raise error
+
+    def _abort(self, error):
+        with self._lock:
+            if self.stats['aborted'] is None:
+                print(f"Aborting the upload: {error}")
+                self.stats['aborted'] = str(error)
+        METRICS.count('upload_aborted_total')
+
+    def _send(self, payloads):
+        body = b'[' + b','.join(payloads) + b']'
+        METRICS.count('upload_bytes_total', len(body))
+        self._request('POST', {'on_conflict': self.on_conflict}, body,
+                      prefer='resolution=merge-duplicates,return=minimal')
+
+    def _upload(self, records, payloads, on_uploaded=None):
+        if self.stats['aborted']:
+            self._count('skipped', len(records))
+            return
+        # Split a rejected batch in half until the rows that cannot be uploaded are isolated
+        try:
+            self._send(payloads)
+        except UploadError as e:
+            if e.fatal:
+                # Splitting would only repeat the same failure once per row
+                self._abort(e)
+                self._count('skipped', len(records))
+                return
+            if len(records) == 1:
+                print(f"Error uploading row: {e}")
+                self._reject(records[0], e)
+                return
+            middle = len(records) // 2
+            self._upload(records[:middle], payloads[:middle], on_uploaded)
+            self._upload(records[middle:], payloads[middle:], on_uploaded)
+            return
+        self._count('uploaded', len(records))
+        if on_uploaded is not None:
+            on_uploaded(records)
+
+    def _batches(self, records):
+        batch, payloads, size = [], [], 2
+        for record in records:
+            try:
+                payload = json.dumps(record, ensure_ascii=False, allow_nan=False).encode('utf-8')
+            except ValueError as e:
+                self._reject(record, e)
+                continue
+            if batch and (size + len(payload) + 1 > self.max_batch_bytes or len(batch) >= self.max_batch_rows):
+                yield batch, payloads
+                batch, payloads, size = [], [], 2
+            batch.append(record)
+            payloads.append(payload)
+            size += len(payload) + 1
+        if batch:
+            yield batch, payloads
+
+    def upsert(self, records, on_uploaded=None):
+        """
+        Upserts records, keeping a bounded number of batches in flight.
+
+        Args:
+            records (iterable): JSON-serializable dicts; consumed lazily.
+            on_uploaded (callable): Called from a worker thread with each list of records the server accepted.
+
+        Returns:
+            dict: Running totals: uploaded, deleted, dead_lettered, skipped, requests and retries, and
+                aborted: the error that stopped the run, or None. Once aborted, the remaining records are
+                neither sent nor dead-lettered; they count as skipped.
+        """
+        pending = deque()
+        for batch, payloads in self._batches(records):
+            if self.stats['aborted']:
+                self._count('skipped', len(batch))
+                continue
+            if len(pending) >= self.concurrency * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    future.result()
+                print(f"Uploaded {self.stats['uploaded']} records, {self.stats['dead_lettered']} dead-lettered")
+            pending.append(self._executor.submit(self._upload, batch, payloads, on_uploaded))
+        for future in pending:
+            future.result()
+        return dict(self.stats)
+
+    def fetch_column(self, column, page_size=1000):
+        """
+        Reads one column of every row in the table, page by page.
+
+        Args:
+            column (str): Column to read, e.g. the upsert key.
+            page_size (int): Rows per request.
+
+        Returns:
+            list: The column's values, including None for rows where it is null.
+        """
+        values = []
+        while True:
+            response = self._request('GET', {'select': column, 'order': f'{column}.asc.nullsfirst',
+                                             'limit': page_size, 'offset': len(values)})
+            page = [row[column] for row in response.json()]
+            values.extend(page)
+            if len(page) < page_size:
+                return values
+
+    def delete(self, values, column, batch_size=100):
+        """
+        Deletes the rows whose column matches any of values, batch_size values per request.
+
+        Args:
+            values (iterable): Key values to delete.
+            column (str): Column to match, e.g. the upsert key.
+            batch_size (int): Values per request; they travel in the query string.
+
+        Returns:
+            list: The values whose delete request failed or was not sent because the run was aborted.
+        """
+        values = list(values)
+        failed = []
+
+        def delete_batch(batch):
+            if self.stats['aborted']:
+                return batch
+            # PostgREST in-filter; double quotes keep commas and parentheses inside values intact
+            quoted = ','.join('"{}"'.format(str(value).replace('\\', '\\\\').replace('"', '\\"')) for value in batch)
+            try:
+                self._request('DELETE', {column: f'in.({quoted})'})
+            except UploadError as e:
+                if e.fatal:
+                    self._abort(e)
+                else:
+                    print(f"Error deleting {len(batch)} rows: {e}")
+                return batch
+            self._count('deleted', len(batch))
+            return []
+
+        futures = [self._executor.submit(delete_batch, values[i:i + batch_size]) for i in range(0, len(values), batch_size)]
+        for future in futures:
+            failed.extend(future.result())
+        return failed
@@ -0,0 +1,300 @@
+import os
+import threading
+import time
+
+from metrics import METRICS
+from score_cache import ScoreCache
+
+# torch and transformers are imported inside the functions that need them: importing them
+# costs seconds and a lot of memory, and a crawl run with --no-score never needs them.
+
+DEFAULT_MODEL = "facebook/bart-large-mnli"
+CANDIDATE_LABELS = ["Easy", "Hard to Know"]
+DIFFICULT_LABEL = "Hard to Know"
+HYPOTHESIS_TEMPLATE = "This example is {}."
+ONNX_DIR = 'onnx_models'
+
+
+class TorchBackend:
+    name = 'torch'
+
+    def __init__(self, model_name, device=-1):
+        """
+        Full-precision PyTorch inference.
+
+        Args:
+            model_name (str): Hugging Face model name.
+            device (int): Device to run the model on (-1 for CPU, >=0 for GPU).
+        """
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        self.device = torch.device('cpu' if device < 0 else f'cuda:{device}')
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(self.device).eval()
+
+    def __call__(self, inputs):
+        """
+        Args:
+            inputs (dict): Tokenizer output as torch tensors.
+
+        Returns:
+            torch.Tensor: Logits of shape (pairs, classes) on the CPU.
+        """
+        inputs = {name: tensor.to(self.device) for name, tensor in inputs.items()}
+        return self.model(**inputs).logits.float().cpu()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    name = 'int8'
+
+    def __init__(self, model_name, device=-1):
+        """
+        PyTorch inference with Linear layers dynamically quantized to int8 (CPU only).
+        """
+        if device >= 0:
+            raise ValueError("The int8 backend only runs on CPU (device=-1).")
+        import torch
+
+        super().__init__(model_name, device=-1)
+        self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend:
+    name = 'onnx'
+
+    def __init__(self, model_name, device=-1, onnx_dir=ONNX_DIR):
+        """
+        ONNX Runtime CPU inference. The model is exported once and reused from onnx_dir.
+
+        Args:
+            model_name (str): Hugging Face model name.
+            device (int): Must be -1; the backend uses the CPU execution provider.
+            onnx_dir (str): Directory holding exported models.
+        """
+        import onnxruntime
+
+        if device >= 0:
+            raise ValueError("The onnx backend only runs on CPU (device=-1).")
+        path = os.path.join(onnx_dir, model_name.strip('/').replace('/', '__') + '.onnx')
+        if not os.path.exists(path):
+            self.export(model_name, path)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    @staticmethod
+    def export(model_name, path):
+        """
+        Exports the sequence classification model to ONNX with dynamic batch and sequence axes.
+        """
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        class LogitsOnly(torch.nn.Module):
+            # The exporter cannot trace the decoder cache objects BART returns, so only export the logits
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, input_ids, attention_mask):
+                return self.model(input_ids=input_ids, attention_mask=attention_mask, use_cache=False).logits
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        model = LogitsOnly(AutoModelForSequenceClassification.from_pretrained(model_name).eval())
+        dummy = AutoTokenizer.from_pretrained(model_name)(["premise"], ["hypothesis"], return_tensors='pt')
+        axes = {0: 'batch', 1: 'sequence'}
+        with torch.inference_mode():
+            torch.onnx.export(
+                model, (dummy['input_ids'], dummy['attention_mask']), path,
+                input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+                dynamic_axes={'input_ids': axes, 'attention_mask': axes, 'logits': {0: 'batch'}},
+                opset_version=17, dynamo=False,
+            )
+
+    def __call__(self, inputs):
+        import torch
+
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        return torch.from_numpy(self.session.run(['logits'], feed)[0]).float()
+
+
+BACKENDS = {backend.name: backend for backend in (TorchBackend, QuantizedTorchBackend, OnnxBackend)}
+
+class ZeroShotEngine:
+    def __init__(self, model_name=DEFAULT_MODEL, device=-1, labels=CANDIDATE_LABELS,
+                 hypothesis_template=HYPOTHESIS_TEMPLATE, backend='torch'):
+        """
+        Shared NLI zero-shot scoring engine.
+
+        Every (text, hypothesis) pair of a batch goes through the model in a single forward
+        pass, and the per-label entailment logits are normalized with a softmax across the
+        labels, which is what the zero-shot-classification pipeline does for single-label
+        classification. Callers get both the top label and the per-label scores from that one pass.
+
+        The tokenizer and model are loaded on the first call to score(); use get_engine()
+        to share one engine per process.
+
+        Args:
+            model_name (str): Hugging Face MNLI model name.
+            device (int): Device to run the model on (-1 for CPU, >=0 for GPU).
+            labels (list): Candidate labels.
+            hypothesis_template (str): Template the labels are inserted into.
+            backend (str): Inference backend: 'torch' (fp32), 'int8' (dynamically quantized) or 'onnx' (ONNX Runtime).
+        """
+        self.model_name = model_name
+        # Quantized backends give slightly different scores, so they get their own cache entries
+        self.cache_model_id = model_name if backend == 'torch' else f"{model_name}:{backend}"
+        self.labels = list(labels)
+        self.hypothesis_template = hypothesis_template
+        self.hypotheses = [hypothesis_template.format(label) for label in self.labels]
+        self.device = device
+        self.backend_name = backend
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {sorted(BACKENDS)}")
+
+        self.tokenizer = None
+        self.backend = None
+        self.entailment_id = None
+        self._load_lock = threading.Lock()
+
+    def _load(self):
+        with self._load_lock:
+            if self.backend is not None:
+                return
+            from transformers import AutoConfig, AutoTokenizer
+
+            print(f"Loading {self.model_name} ({self.backend_name} backend)...")
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self.entailment_id = self._entailment_id(AutoConfig.from_pretrained(self.model_name))
+            self.backend = BACKENDS[self.backend_name](self.model_name, device=self.device)
+
+    @staticmethod
+    def _entailment_id(config):
+        for label, label_id in config.label2id.items():
+            if label.lower().startswith('entail'):
+                return label_id
+        raise ValueError("Could not find an entailment label in the model config; is this an NLI model?")
+
+    def _forward(self, texts):
+        premises = [text for text in texts for _ in self.hypotheses]
+        hypotheses = self.hypotheses * len(texts)
+        inputs = self.tokenizer(premises, hypotheses, padding=True, truncation='only_first', return_tensors='pt')
+        logits = self.backend(inputs)[:, self.entailment_id].reshape(len(texts), len(self.labels))
+        return logits.softmax(dim=-1).tolist()
+
+    def score(self, texts, batch_size=32, cache=None):
+        """
+        Scores texts against all candidate labels.
+
+        Texts are sorted by token length so each batch pads to a similar length, and results
+        are returned in the input order. A failing batch is retried text by text so one bad
+        text only loses its own scores.
+
+        Args:
+            texts (iterable): The texts to classify.
+            batch_size (int): Number of texts per forward pass.
+            cache (ScoreCache): Optional persistent score cache; only misses are run through the model.
+
+        Returns:
+            list: Per-label score lists aligned with texts (in self.labels order); None for empty or failed texts.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        todo = [i for i, text in enumerate(texts) if isinstance(text, str) and text]
+
+        keys = {}
+        if cache is not None and todo:
+            keys = {i: ScoreCache.key(self.cache_model_id, self.labels, self.hypothesis_template, texts[i]) for i in todo}
+            cached = cache.get_many(set(keys.values()))
+            for i in todo:
+                results[i] = cached.get(keys[i])
+            todo = [i for i in todo if results[i] is None]
+            print(f"Score cache: {len(cached)} hits, {len(todo)} misses")
+            METRICS.count('score_cache_hits_total', len(keys) - len(todo))
+            METRICS.count('score_cache_misses_total', len(todo))
+        if not todo:
+            return results
+
+        import torch
+
+        self._load()
+        lengths = self.tokenizer([texts[i] for i in todo], add_special_tokens=False)['input_ids']
+        order = [i for _, i in sorted(zip(map(len, lengths), todo))]
+
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                chunk = order[start:start + batch_size]
+                batch_start = time.perf_counter()
+                try:
+                    chunk_scores = self._forward([texts[i] for i in chunk])
+                except Exception as e:
+                    print(f"Error scoring batch, retrying per text: {str(e)}")
+                    chunk_scores = []
+                    for i in chunk:
+                        try:
+                            chunk_scores.append(self._forward([texts[i]])[0])
+                        except Exception as e:
+                            print(f"Error scoring: {texts[i]}")
+                            print(f"Error message: {str(e)}")
+                            chunk_scores.append(None)
+
+                METRICS.observe('score_batch_seconds', time.perf_counter() - batch_start, backend=self.backend_name)
+                METRICS.count('texts_scored_total', len(chunk), backend=self.backend_name)
+                new_entries = {}
+                for i, label_scores in zip(chunk, chunk_scores):
+                    results[i] = label_scores
+                    if cache is not None and label_scores is not None:
+                        new_entries[keys[i]] = label_scores
+                if new_entries:
+                    cache.put_many(new_entries)
+        return results
+
+    def classify(self, texts, batch_size=32, cache=None, score_label=DIFFICULT_LABEL):
+        """
+        Returns the top label and the score of one label for every text, from a single scoring pass.
+
+        Args:
+            texts (iterable): The texts to classify.
+            batch_size (int): Number of texts per forward pass.
+            cache (ScoreCache): Optional persistent score cache.
+            score_label (str): Label whose score is returned.
+
+        Returns:
+            tuple: (list of top labels, list of scores); None / NaN for empty or failed texts.
+        """
+        score_index = self.labels.index(score_label)
+        categories, scores = [], []
+        for label_scores in self.score(texts, batch_size=batch_size, cache=cache):
+            if label_scores is None:
+                categories.append(None)
+                scores.append(float('nan'))
+            else:
+                categories.append(self.labels[label_scores.index(max(label_scores))])
+                scores.append(label_scores[score_index])
+        return categories, scores
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(model_name=DEFAULT_MODEL, device=-1, labels=CANDIDATE_LABELS,
+               hypothesis_template=HYPOTHESIS_TEMPLATE, backend='torch'):
+    """
+    Returns the process-wide engine for these settings, creating it on first use.
+
+    The engine itself only loads the model when it first has something to score, so
+    callers can create scorers up front without paying for the model.
+
+    Returns:
+        ZeroShotEngine: The shared engine.
+    """
+    key = (model_name, device, tuple(labels), hypothesis_template, backend)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = ZeroShotEngine(model_name, device=device, labels=labels,
+                                    hypothesis_template=hypothesis_template, backend=backend)
+            _engines[key] = engine
+        return engine